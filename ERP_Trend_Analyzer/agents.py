@@ -3,19 +3,104 @@ AutoGen Multi-Agent System for ERP Trending News Analysis
 This module contains the 4 specialized agents for the trend analysis pipeline.
 """
 
-import os
 from datetime import datetime
-from dotenv import load_dotenv
+from typing import Sequence
 from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.base import Response, TerminatedException, TerminationCondition
 from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.conditions import TextMentionTermination, MaxMessageTermination
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_agentchat.conditions import (
+    TextMentionTermination,
+    MaxMessageTermination,
+    TimeoutTermination,
+    TokenUsageTermination,
+)
+from autogen_agentchat.messages import AgentEvent, ChatMessage, StopMessage
 
-load_dotenv()
+from model_backends import create_model_client, get_model_name
+from tracing import span
 
-# Get API key and model from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Pipeline stages, in the order the round robin visits them
+AGENT_NAMES = ["TrendCollector", "ContentWriter", "SEOOptimizer", "FactChecker"]
+
+# USD per 1M tokens (prompt, completion), used for cost ceilings and reports
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int, model: str | None = None) -> float:
+    """
+    Estimate the USD cost of a model call (default: the configured backend's model).
+    Unknown and local models are priced at zero.
+    """
+    model = model or get_model_name()
+    prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class StageCompletionTermination(TerminationCondition):
+    """
+    Stop once every pipeline stage has produced a message.
+    Guards against FactChecker forgetting 'TERMINATE' and the round robin looping back.
+    """
+
+    def __init__(self, sources: Sequence[str] = AGENT_NAMES) -> None:
+        self._sources = list(sources)
+        self._seen = set()
+
+    @property
+    def terminated(self) -> bool:
+        return self._seen.issuperset(self._sources)
+
+    async def __call__(self, messages: Sequence[AgentEvent | ChatMessage]) -> StopMessage | None:
+        if self.terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if message.source in self._sources:
+                self._seen.add(message.source)
+        if self.terminated:
+            return StopMessage(
+                content=f"All stages completed: {', '.join(self._sources)}.",
+                source="StageCompletionTermination",
+            )
+        return None
+
+    async def reset(self) -> None:
+        self._seen = set()
+
+
+class CostCeilingTermination(TerminationCondition):
+    """Stop once the estimated USD cost of the conversation reaches a ceiling."""
+
+    def __init__(self, max_cost_usd: float, model: str | None = None) -> None:
+        self._max_cost_usd = max_cost_usd
+        self._model = model or get_model_name()
+        self._cost = 0.0
+
+    @property
+    def terminated(self) -> bool:
+        return self._cost >= self._max_cost_usd
+
+    async def __call__(self, messages: Sequence[AgentEvent | ChatMessage]) -> StopMessage | None:
+        if self.terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if message.models_usage is not None:
+                self._cost += estimate_cost(
+                    message.models_usage.prompt_tokens,
+                    message.models_usage.completion_tokens,
+                    self._model,
+                )
+        if self.terminated:
+            return StopMessage(
+                content=f"Cost ceiling reached: ${self._cost:.4f} of ${self._max_cost_usd:.4f}.",
+                source="CostCeilingTermination",
+            )
+        return None
+
+    async def reset(self) -> None:
+        self._cost = 0.0
 
 
 def get_current_date_context():
@@ -33,12 +118,24 @@ CRITICAL INSTRUCTIONS:
 """
 
 
-def get_model_client():
-    """Create and return the OpenAI model client."""
-    return OpenAIChatCompletionClient(
-        model=OPENAI_MODEL,
-        api_key=OPENAI_API_KEY,
-    )
+def get_model_client(backend: str | None = None):
+    """
+    Create and return the model client for a backend: 'openai' (hosted) or 'local'
+    (OpenAI-compatible server). Defaults to the MODEL_BACKEND setting.
+    """
+    return create_model_client(backend)
+
+
+class TracedAssistantAgent(AssistantAgent):
+    """AssistantAgent whose turns are traced as 'agent.turn' spans (no-op when tracing is off)."""
+
+    async def on_messages_stream(self, messages, cancellation_token):
+        with span("agent.turn", agent=self.name) as turn:
+            async for event in super().on_messages_stream(messages, cancellation_token):
+                if isinstance(event, Response) and event.chat_message.models_usage:
+                    usage = event.chat_message.models_usage
+                    turn.set_attributes(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+                yield event
 
 
 def create_trend_collector_agent(model_client) -> AssistantAgent:
@@ -48,7 +145,7 @@ def create_trend_collector_agent(model_client) -> AssistantAgent:
     """
     date_context = get_current_date_context()
     
-    return AssistantAgent(
+    return TracedAssistantAgent(
         name="TrendCollector",
         model_client=model_client,
         system_message=f"""You are an expert ERP industry analyst and trend researcher.
@@ -89,6 +186,11 @@ Format your response as a structured report with clear sections.
 Include timeframes (e.g., "Q4 2025", "Early 2026", "Throughout 2026") where relevant.
 End your message with a summary of top CURRENT and FUTURE trends.
 
+After the summary, add a machine-readable list of the trends you covered, exactly in this form:
+```json
+{{"trends": [{{"title": "Trend headline", "summary": "One-sentence summary", "companies": ["Company"], "timeframe": "Early 2026"}}]}}
+```
+
 After completing your analysis, pass the information to the next agent for content creation."""
     )
 
@@ -100,7 +202,7 @@ def create_content_writer_agent(model_client) -> AssistantAgent:
     """
     date_context = get_current_date_context()
     
-    return AssistantAgent(
+    return TracedAssistantAgent(
         name="ContentWriter",
         model_client=model_client,
         system_message=f"""You are a professional tech content writer specializing in ERP and enterprise software.
@@ -152,7 +254,7 @@ def create_seo_optimizer_agent(model_client) -> AssistantAgent:
     """
     date_context = get_current_date_context()
     
-    return AssistantAgent(
+    return TracedAssistantAgent(
         name="SEOOptimizer",
         model_client=model_client,
         system_message=f"""You are an expert SEO specialist with deep knowledge of content optimization for search engines.
@@ -222,7 +324,7 @@ def create_fact_checker_agent(model_client) -> AssistantAgent:
     """
     date_context = get_current_date_context()
     
-    return AssistantAgent(
+    return TracedAssistantAgent(
         name="FactChecker",
         model_client=model_client,
         system_message=f"""You are a meticulous fact-checker and content verification specialist.
@@ -300,11 +402,45 @@ After completing your assessment, output 'TERMINATE' to end the workflow."""
     )
 
 
-async def create_agent_team():
+def build_termination_condition(
+    max_messages: int = 10,
+    stop_after_all_stages: bool = True,
+    stages: Sequence[str] = AGENT_NAMES,
+    max_total_tokens: int | None = None,
+    max_cost_usd: float | None = None,
+    timeout_seconds: float | None = None,
+    model: str | None = None,
+) -> TerminationCondition:
+    """Combine the termination conditions for a run; whichever fires first stops the team."""
+    termination = TextMentionTermination("TERMINATE") | MaxMessageTermination(max_messages=max_messages)
+    if stop_after_all_stages:
+        termination = termination | StageCompletionTermination(stages)
+    if max_total_tokens is not None:
+        termination = termination | TokenUsageTermination(max_total_token=max_total_tokens)
+    if max_cost_usd is not None:
+        termination = termination | CostCeilingTermination(max_cost_usd, model)
+    if timeout_seconds is not None:
+        termination = termination | TimeoutTermination(timeout_seconds)
+    return termination
+
+
+async def create_agent_team(
+    max_messages: int = 10,
+    stop_after_all_stages: bool = True,
+    max_total_tokens: int | None = None,
+    max_cost_usd: float | None = None,
+    timeout_seconds: float | None = None,
+    backend: str | None = None,
+    model_client=None,
+):
     """
     Create and return the Round Robin Group Chat team with all 4 agents.
+
+    The run stops on 'TERMINATE', after max_messages, once every stage has spoken
+    (stop_after_all_stages), or when the optional token, cost or wall-clock limits are hit.
+    backend selects the model backend ('openai' or 'local'); see get_model_client().
     """
-    model_client = get_model_client()
+    model_client = model_client or get_model_client(backend)
     
     # Create all agents
     trend_collector = create_trend_collector_agent(model_client)
@@ -313,7 +449,14 @@ async def create_agent_team():
     fact_checker = create_fact_checker_agent(model_client)
     
     # Set up termination conditions
-    termination = TextMentionTermination("TERMINATE") | MaxMessageTermination(max_messages=10)
+    termination = build_termination_condition(
+        max_messages=max_messages,
+        stop_after_all_stages=stop_after_all_stages,
+        max_total_tokens=max_total_tokens,
+        max_cost_usd=max_cost_usd,
+        timeout_seconds=timeout_seconds,
+        model=get_model_name(backend),
+    )
     
     # Create Round Robin Group Chat
     team = RoundRobinGroupChat(
@@ -324,6 +467,41 @@ async def create_agent_team():
     return team
 
 
+async def create_downstream_team(
+    max_messages: int = 8,
+    stop_after_all_stages: bool = True,
+    max_total_tokens: int | None = None,
+    max_cost_usd: float | None = None,
+    timeout_seconds: float | None = None,
+    backend: str | None = None,
+    model_client=None,
+):
+    """
+    Create a Round Robin team of ContentWriter, SEOOptimizer and FactChecker that works
+    from an existing TrendCollector report passed in the task (fan-out runs).
+    """
+    model_client = model_client or get_model_client(backend)
+    
+    content_writer = create_content_writer_agent(model_client)
+    seo_optimizer = create_seo_optimizer_agent(model_client)
+    fact_checker = create_fact_checker_agent(model_client)
+    
+    termination = build_termination_condition(
+        max_messages=max_messages,
+        stop_after_all_stages=stop_after_all_stages,
+        stages=AGENT_NAMES[1:],
+        max_total_tokens=max_total_tokens,
+        max_cost_usd=max_cost_usd,
+        timeout_seconds=timeout_seconds,
+        model=get_model_name(backend),
+    )
+    
+    return RoundRobinGroupChat(
+        participants=[content_writer, seo_optimizer, fact_checker],
+        termination_condition=termination,
+    )
+
+
 def get_agent_info():
     """Return information about each agent for UI display."""
     return [
@@ -356,3 +534,7 @@ def get_agent_info():
             "color": "#96CEB4"
         }
     ]
+
+
+# Agent info indexed by name, built once per process
+AGENT_INFO_BY_NAME = {agent['name']: agent for agent in get_agent_info()}
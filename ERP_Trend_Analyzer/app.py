@@ -5,17 +5,34 @@ A clean, modern dashboard for analyzing ERP industry trends using AutoGen agents
 
 import streamlit as st
 import asyncio
+import time
 import plotly.graph_objects as go
 from datetime import datetime
-import re
+import math
+import markdown
 import os
 from dotenv import load_dotenv
 
 # Import agent functions
-from agents import create_agent_team, get_agent_info
+from agents import AGENT_INFO_BY_NAME, AGENT_NAMES, get_agent_info
+from model_backends import MODEL_BACKEND
+from pipeline import (
+    REVISION_MAX_ITERATIONS,
+    REVISION_MIN_SCORE,
+    get_cached_result,
+    run_store,
+    shared_runs,
+    trend_history,
+)
+from scoring import calculate_overall_score, extract_scores_from_response
+from tracing import span
 
 load_dotenv()
 
+# Full Report rendering
+REPORT_PREVIEW_CHARS = 3000
+REPORT_PAGE_SIZE = 10
+
 # Page Configuration
 st.set_page_config(
     page_title="ERP Trend Agent",
@@ -592,60 +609,97 @@ def create_donut_chart(scores: dict):
     return fig
 
 
-def extract_scores_from_response(response: str) -> dict:
-    """Extract credibility scores from the fact checker's response."""
-    scores = {
-        'Factual Accuracy': 85,
-        'Source Credibility': 80,
-        'Content Quality': 88,
-        'Timeliness': 90
-    }
-    
-    patterns = [
-        (r'Factual Accuracy[:\s|]*(\d+)%?', 'Factual Accuracy'),
-        (r'Source Credibility[:\s|]*(\d+)%?', 'Source Credibility'),
-        (r'Content Quality[:\s|]*(\d+)%?', 'Content Quality'),
-        (r'Timeliness[:\s|]*(\d+)%?', 'Timeliness'),
-    ]
-    
-    for pattern, key in patterns:
-        match = re.search(pattern, response, re.IGNORECASE)
-        if match:
-            try:
-                scores[key] = int(match.group(1))
-            except ValueError:
-                pass
-    
-    return scores
+def run_version(run_id: str) -> tuple:
+    """
+    (status, message count) of a run. The views below are cached for every session, so
+    they are keyed by it too: a session that stopped following a shared run must not
+    freeze its partial outputs for sessions that see the run finish.
+    """
+    run = run_store.get_run(run_id)
+    return (run['status'] if run else None, run_store.count_messages(run_id))
 
 
-def calculate_overall_score(scores: dict) -> float:
-    """Calculate weighted overall credibility score."""
-    weights = {
-        'Factual Accuracy': 0.40,
-        'Source Credibility': 0.25,
-        'Content Quality': 0.20,
-        'Timeliness': 0.15
-    }
-    
-    total = sum(scores.get(k, 0) * w for k, w in weights.items())
-    return round(total, 1)
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_agent_outputs(run_id: str, version: tuple) -> dict:
+    """Latest output per agent for a run at a given version (see run_version), shared by all sessions."""
+    return run_store.get_agent_outputs(run_id)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_report_blocks(run_id: str, version: tuple) -> list:
+    """
+    Render model for the Full Report: one HTML block per message.
+    Markdown is converted once per message and memoized by run ID and version.
+    """
+    blocks = []
+    for result in run_store.get_messages(run_id):
+        agent_info = AGENT_INFO_BY_NAME.get(result['agent'])
+        if agent_info is None:
+            continue
+        content = result['content']
+        preview = content[:REPORT_PREVIEW_CHARS] + ('...' if len(content) > REPORT_PREVIEW_CHARS else '')
+        body = markdown.markdown(preview, extensions=['tables'])
+        blocks.append(
+            '<div class="output-box">'
+            '<div class="output-header">'
+            f'<span style="font-size: 1.25rem;">{agent_info["icon"]}</span>'
+            f'<span class="output-agent">{result["agent"]}</span>'
+            f'<span class="output-time">🕐 {result["timestamp"]}</span>'
+            '</div>'
+            f'<div class="output-content">{body}</div>'
+            '</div>'
+        )
+    return blocks
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_trend_diff(run_id: str, version: tuple) -> dict | None:
+    """Trend diff against the topic's previous run, or None for a first run."""
+    return trend_history.get_diff(run_id)
+
+
+def render_trend_diff(diff: dict):
+    """Show the change summary between this run and the previous run of the topic."""
+    st.markdown("#### 🔄 What's Changed Since the Last Run")
+    cols = st.columns(4)
+    for col, (key, label) in zip(cols, [('new', '🆕 New'), ('changed', '✏️ Changed'),
+                                        ('dropped', '🗑️ Dropped'), ('unchanged', '➖ Unchanged')]):
+        col.metric(label, len(diff[key]))
+    with st.expander("Trend changes", expanded=False):
+        for key, label in [('new', '🆕 New'), ('changed', '✏️ Changed'), ('dropped', '🗑️ Dropped')]:
+            if diff[key]:
+                st.markdown(f"**{label}**")
+                st.markdown("\n".join(f"- {title}" for title in diff[key]))
+
+
+def cancel_running_analysis():
+    """
+    Stop following the run; completed agent outputs are kept. The run itself is only
+    cancelled when no other session has joined it.
+    """
+    if st.session_state.flight is not None:
+        st.session_state.flight.cancel(st.session_state.subscriber)
+        st.session_state.cancel_requested = True
 
 
 def main():
     """Main application function."""
     
-    # Initialize session state
-    if 'results' not in st.session_state:
-        st.session_state.results = []
-    if 'agent_outputs' not in st.session_state:
-        st.session_state.agent_outputs = {}
+    # Initialize session state (runs live in the shared run store; sessions keep IDs only)
+    if 'run_id' not in st.session_state:
+        st.session_state.run_id = None
     if 'is_running' not in st.session_state:
         st.session_state.is_running = False
     if 'completed_agents' not in st.session_state:
         st.session_state.completed_agents = []
     if 'current_agent' not in st.session_state:
         st.session_state.current_agent = -1
+    if 'flight' not in st.session_state:
+        st.session_state.flight = None
+        st.session_state.subscriber = None
+        st.session_state.cancel_requested = False
+    if 'run_notice' not in st.session_state:
+        st.session_state.run_notice = None
     
     # Header
     st.markdown('<h1 class="main-header">📊 ERP Trend Agent</h1>', unsafe_allow_html=True)
@@ -683,6 +737,18 @@ def main():
         
         st.markdown("---")
         
+        st.markdown("### 🔁 Revision Mode")
+        st.checkbox(
+            "Auto-revise low-scoring drafts",
+            key="auto_revise",
+            disabled=st.session_state.is_running,
+            help=f"When the credibility score is below {REVISION_MIN_SCORE:.0f}%, only the flagged caution areas "
+                 f"and outdated information go back to the Content Writer, followed by a re-check "
+                 f"(up to {REVISION_MAX_ITERATIONS} times)."
+        )
+        
+        st.markdown("---")
+        
         st.markdown("### ℹ️ How It Works")
         st.markdown("""
         <div class="info-box">
@@ -709,14 +775,26 @@ def main():
         
         if st.button("🚀 Analyze Trends", use_container_width=True, disabled=st.session_state.is_running):
             api_key = os.getenv("OPENAI_API_KEY", "")
-            if not api_key or api_key == "your-openai-api-key-here":
+            run_config = {'max_revisions': REVISION_MAX_ITERATIONS} if st.session_state.get('auto_revise') else {}
+            cached = get_cached_result(topic, **run_config)
+            if cached is not None:
+                # Fresh result from an earlier or pre-warmed run
+                index = run_store.list_messages(cached['run_id'])
+                st.session_state.run_id = cached['run_id']
+                st.session_state.completed_agents = sorted({AGENT_NAMES.index(m['agent']) for m in index})
+                computed_at = datetime.fromtimestamp(cached['created_at']).strftime('%b %d, %H:%M')
+                st.session_state.run_notice = ('info', f"⚡ Served from cache (computed {computed_at})")
+                st.rerun()
+            elif MODEL_BACKEND == "openai" and (not api_key or api_key == "your-openai-api-key-here"):
                 st.error("⚠️ Please set your OpenAI API key in the .env file!")
             else:
                 st.session_state.is_running = True
-                st.session_state.results = []
-                st.session_state.agent_outputs = {}
+                st.session_state.run_id = None
                 st.session_state.completed_agents = []
                 st.session_state.current_agent = 0
+                st.session_state.flight, st.session_state.subscriber = shared_runs.join(topic, **run_config)
+                st.session_state.cancel_requested = False
+                st.session_state.run_notice = None
                 st.rerun()
     
     with col2:
@@ -732,107 +810,152 @@ def main():
         st.markdown("---")
         st.markdown("### ⚡ Processing...")
         
+        flight = st.session_state.flight
+        cancel_requested = st.session_state.cancel_requested
+        st.button(
+            "⏹️ Cancel Analysis",
+            use_container_width=True,
+            on_click=cancel_running_analysis,
+            disabled=cancel_requested
+        )
+        
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        agent_names = ['TrendCollector', 'ContentWriter', 'SEOOptimizer', 'FactChecker']
+        agent_names = AGENT_NAMES
         output_containers = {}
         
         for agent_name in agent_names:
             with st.expander(f"📋 {agent_name} Output", expanded=False):
                 output_containers[agent_name] = st.empty()
         
+        completed = []
+        error = None
+        
+        async def received_so_far():
+            # After Cancel, show what arrived without waiting on a run other sessions still follow
+            for message in list(flight.messages):
+                yield message
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
             async def run_with_progress():
-                team = await create_agent_team()
-                task_topic = topic if topic else "Latest ERP Industry Trends and Developments"
-                current_date = datetime.now().strftime('%B %d, %Y')
-                task = f"""📅 **TODAY'S DATE: {current_date}**
-
-Analyze the following topic for CURRENT and FUTURE trending news. Create optimized content.
-
-⚠️ CRITICAL: Focus ONLY on:
-- What's happening RIGHT NOW (December 2025)
-- What's coming in 2026 and beyond
-- DO NOT discuss past events or outdated trends
-
-TOPIC: {task_topic}
-
-Please work through the complete workflow:
-1. TrendCollector: Research and identify the LATEST (2025) and UPCOMING (2026) trends
-2. ContentWriter: Create engaging, forward-looking content
-3. SEOOptimizer: Optimize with current year keywords (2025, 2026)
-4. FactChecker: Verify accuracy and TIMELINESS (must be current/future, not past)
-
-Begin the analysis now - remember we are at the END of 2025!"""
-                
-                results = []
-                agent_outputs = {}
-                completed = []
-                
-                async for message in team.run_stream(task=task):
-                    if hasattr(message, 'source') and hasattr(message, 'content'):
-                        source = message.source
-                        content = message.content
-                        
-                        if source and content and source in agent_names:
-                            current_idx = agent_names.index(source)
-                            if current_idx not in completed:
-                                completed.append(current_idx)
-                            
-                            agent_outputs[source] = content
-                            results.append({
-                                'agent': source,
-                                'content': content,
-                                'timestamp': datetime.now().strftime('%H:%M:%S')
-                            })
-                            
-                            progress = len(completed) / len(agent_names)
-                            progress_bar.progress(progress)
+                started = time.monotonic()
+                # Identical in-flight topics share one run; rejoining after a rerun replays it
+                messages = received_so_far() if cancel_requested else flight.subscribe()
+                next_message = asyncio.ensure_future(anext(messages))
+                try:
+                    while True:
+                        done, _ = await asyncio.wait({next_message}, timeout=0.5)
+                        if not done:
+                            # Heartbeat between messages so a Cancel click is handled promptly
+                            waiting_on = agent_names[min(len(completed), len(agent_names) - 1)]
+                            status_text.markdown(f"⏳ **{waiting_on}** working... {int(time.monotonic() - started)}s")
+                            continue
+                    
+                        try:
+                            result = next_message.result()
+                        except StopAsyncIteration:
+                            break
+                    
+                        source = result['agent']
+                        current_idx = agent_names.index(source)
+                        if current_idx not in completed:
+                            completed.append(current_idx)
+                    
+                        progress = len(completed) / len(agent_names)
+                        progress_bar.progress(progress)
+                        if result.get('revision'):
+                            status_text.markdown(f"🔁 **{source}** revision {result['revision']} completed")
+                        else:
                             status_text.markdown(f"✨ **{source}** completed")
-                            
-                            if source in output_containers:
-                                output_containers[source].markdown(content)
-                
-                return results, agent_outputs, completed
+                    
+                        if source in output_containers:
+                            output_containers[source].markdown(result['content'])
+                    
+                        next_message = asyncio.ensure_future(anext(messages))
+                finally:
+                    # Also on a Streamlit rerun (a BaseException): stop waiting and unsubscribe
+                    next_message.cancel()
+                    await asyncio.gather(next_message, return_exceptions=True)
+                    await messages.aclose()
             
-            results, agent_outputs, completed = loop.run_until_complete(run_with_progress())
+            with span("ui.run", run_id=flight.run_id) as ui_run:
+                loop.run_until_complete(run_with_progress())
+                ui_run.set_attribute('messages', len(completed))
+        except Exception as e:
+            error = e
+        finally:
             loop.close()
-            
-            st.session_state.results = results
-            st.session_state.agent_outputs = agent_outputs
-            st.session_state.completed_agents = completed
-            st.session_state.is_running = False
-            st.session_state.current_agent = -1
-            
+            asyncio.set_event_loop(None)
+        
+        # This session is done following the run; it keeps going for anyone else
+        flight.detach(st.session_state.subscriber)
+        # Keep completed agent outputs even when the run was cancelled or failed
+        st.session_state.run_id = flight.run_id if completed else None
+        st.session_state.completed_agents = completed
+        st.session_state.is_running = False
+        st.session_state.current_agent = -1
+        st.session_state.flight = None
+        st.session_state.subscriber = None
+        st.session_state.cancel_requested = False
+        
+        if error is not None:
+            st.session_state.run_notice = ('error', f"❌ Error: {str(error)}")
+        elif flight.cancelled or cancel_requested:
+            st.session_state.run_notice = ('warning', f"⏹️ Analysis cancelled after {len(completed)} of {len(agent_names)} agents.")
+        else:
+            st.session_state.run_notice = None
             progress_bar.progress(1.0)
             status_text.markdown("✅ **Analysis Complete!**")
-            
-            st.rerun()
-            
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
-            st.session_state.is_running = False
+        
+        st.rerun()
+    
+    if st.session_state.run_notice:
+        level, notice = st.session_state.run_notice
+        if level == 'info':
+            st.info(notice)
+        else:
+            if level == 'error':
+                st.error(notice)
+            else:
+                st.warning(notice)
+            if st.session_state.run_id:
+                st.info("Showing the outputs of the agents that completed.")
     
     # Results Section
-    if st.session_state.agent_outputs and not st.session_state.is_running:
+    if st.session_state.run_id and not st.session_state.is_running:
+        run_id = st.session_state.run_id
+        version = run_version(run_id)
         st.markdown("---")
         st.markdown("### 📊 Analysis Results")
         
-        tab1, tab2, tab3 = st.tabs(["📝 Agent Outputs", "📈 Credibility Score", "📄 Full Report"])
+        trend_diff = load_trend_diff(run_id, version)
+        if trend_diff:
+            render_trend_diff(trend_diff)
+        
+        # Only the selected view is rendered, so its content is loaded on demand
+        view = st.radio(
+            "View",
+            ["📝 Agent Outputs", "📈 Credibility Score", "📄 Full Report"],
+            horizontal=True,
+            key="results_view",
+            label_visibility="collapsed"
+        )
         
-        with tab1:
-            for agent_name, output in st.session_state.agent_outputs.items():
-                agent_info = next((a for a in get_agent_info() if a['name'] == agent_name), None)
+        if view == "📝 Agent Outputs":
+            for agent_name, output in load_agent_outputs(run_id, version).items():
+                agent_info = AGENT_INFO_BY_NAME.get(agent_name)
                 if agent_info:
                     with st.expander(f"{agent_info['icon']} {agent_name} — {agent_info['role']}", expanded=False):
                         st.markdown(output)
         
-        with tab2:
-            fact_checker_output = st.session_state.agent_outputs.get('FactChecker', '')
+        elif view == "📈 Credibility Score":
+            agent_outputs = load_agent_outputs(run_id, version)
+            if 'FactChecker' not in agent_outputs:
+                st.info("FactChecker did not run, so the scores below are defaults.")
+            fact_checker_output = agent_outputs.get('FactChecker', '')
             scores = extract_scores_from_response(fact_checker_output)
             overall_score = calculate_overall_score(scores)
             
@@ -865,22 +988,22 @@ Begin the analysis now - remember we are at the END of 2025!"""
                     </div>
                     """, unsafe_allow_html=True)
         
-        with tab3:
+        else:
             st.markdown("#### 📄 Complete Analysis Report")
             
-            for result in st.session_state.results:
-                agent_info = next((a for a in get_agent_info() if a['name'] == result['agent']), None)
-                if agent_info:
-                    st.markdown(f"""
-                    <div class="output-box">
-                        <div class="output-header">
-                            <span style="font-size: 1.25rem;">{agent_info['icon']}</span>
-                            <span class="output-agent">{result['agent']}</span>
-                            <span class="output-time">🕐 {result['timestamp']}</span>
-                        </div>
-                        <div class="output-content">{result['content'][:3000]}{'...' if len(result['content']) > 3000 else ''}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            blocks = build_report_blocks(run_id, version)
+            page_count = max(1, math.ceil(len(blocks) / REPORT_PAGE_SIZE))
+            page = 1
+            if page_count > 1:
+                page = st.number_input(
+                    f"Page (1-{page_count}, {len(blocks)} messages)",
+                    min_value=1,
+                    max_value=page_count,
+                    value=1,
+                    key=f"report_page_{run_id}"
+                )
+            start = (page - 1) * REPORT_PAGE_SIZE
+            st.markdown("".join(blocks[start:start + REPORT_PAGE_SIZE]), unsafe_allow_html=True)
     
     # Footer
     st.markdown("""
@@ -892,4 +1015,6 @@ Begin the analysis now - remember we are at the END of 2025!"""
 
 
 if __name__ == "__main__":
-    main()
+    # One span per Streamlit script run; reruns show up as separate spans
+    with span("ui.script_run"):
+        main()
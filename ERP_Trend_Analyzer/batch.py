@@ -0,0 +1,238 @@
+"""
+ERP Trend Agent - Sharded Batch Runner
+Splits a large topic list into shards and runs them across worker processes, each with
+its own event loop and one pooled model client. The parent process hands out a global
+requests-per-minute budget, aggregates the results, and on a re-run with the same
+output directory resumes whatever did not finish (e.g. after a crash).
+
+Usage:
+    python batch.py --topics quarterly_topics.txt --workers 4 --out batch/2026-Q1
+    python batch.py --topics quarterly_topics.txt --workers 4 --rpm 300 --out batch/2026-Q1
+    python batch.py --out batch/2026-Q1              # resume with the saved manifest
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from model_backends import BACKENDS, create_model_client, get_model_name
+from pipeline import normalize_topic, stream_agent_messages, summarize_usage
+from prewarm import load_topics
+from scoring import calculate_overall_score, extract_scores_from_response
+
+MANIFEST = "manifest.json"
+
+
+class PermitRateLimiter:
+    """Rate limiter backed by a queue of permits that the parent process refills."""
+
+    def __init__(self, permits):
+        self.permits = permits
+
+    async def acquire(self):
+        await asyncio.to_thread(self.permits.get)
+
+
+def refill_permits(permits, rpm: int, stop: threading.Event):
+    """Add one permit every 60/rpm seconds; a full queue caps the burst."""
+    while not stop.wait(60 / rpm):
+        try:
+            permits.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+def shard_path(out_dir: str, shard: int) -> str:
+    return os.path.join(out_dir, f"shard-{shard:03d}.jsonl")
+
+
+def load_shard_results(out_dir: str, shard: int) -> dict:
+    """Results recorded so far for a shard, by topic; the last attempt of a topic wins."""
+    results = {}
+    path = shard_path(out_dir, shard)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                results[result['topic']] = result
+    return results
+
+
+async def run_topic(topic: str, model_client, options: dict) -> dict:
+    started = time.monotonic()
+    messages, error = [], None
+    try:
+        async for message in stream_agent_messages(topic, model_client=model_client, **options):
+            messages.append(message)
+    except Exception as e:
+        error = str(e)
+    outputs = {m['agent']: m['content'] for m in messages}
+    if error is None and 'FactChecker' not in outputs:
+        error = "run ended before FactChecker"
+    return {
+        'topic': topic,
+        'error': error,
+        'seconds': round(time.monotonic() - started, 1),
+        'usage': summarize_usage(messages, get_model_name(options.get('backend'))),
+        'overall_score': calculate_overall_score(extract_scores_from_response(outputs.get('FactChecker', ''))),
+        'messages': messages,
+    }
+
+
+async def run_shard_async(shard: int, topics: list, out_dir: str, options: dict, concurrency: int, permits) -> dict:
+    done = {t for t, r in load_shard_results(out_dir, shard).items() if r['error'] is None}
+    pending = [topic for topic in topics if topic not in done]
+    rate_limiter = PermitRateLimiter(permits) if permits is not None else None
+    # One client per worker: its connection pool is reused by every topic in the shard
+    model_client = create_model_client(options.get('backend'), rate_limiter=rate_limiter)
+    semaphore = asyncio.Semaphore(concurrency)
+    lock = asyncio.Lock()
+    counts = {'completed': 0, 'failed': 0, 'skipped': len(topics) - len(pending)}
+
+    async def run_and_record(topic):
+        async with semaphore:
+            result = await run_topic(topic, model_client, options)
+        async with lock:
+            with open(shard_path(out_dir, shard), "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        counts['failed' if result['error'] else 'completed'] += 1
+
+    try:
+        await asyncio.gather(*(run_and_record(topic) for topic in pending))
+    finally:
+        await model_client.close()
+    return counts
+
+
+def run_shard(shard: int, topics: list, out_dir: str, options: dict, concurrency: int, permits) -> dict:
+    """Worker process entry point: run one shard on a fresh event loop."""
+    return asyncio.run(run_shard_async(shard, topics, out_dir, options, concurrency, permits))
+
+
+def load_or_create_manifest(out_dir: str, topics: list | None, shards: int, options: dict) -> dict:
+    """Reuse the saved manifest so a re-run resumes the same shards."""
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if not topics:
+        raise SystemExit(f"No manifest in {out_dir}/ - pass --topics to start a new batch")
+    topics = list({normalize_topic(topic): topic for topic in topics}.values())
+    manifest = {
+        'options': options,
+        'shards': [topics[i::shards] for i in range(shards) if topics[i::shards]],
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def run_batch(manifest: dict, out_dir: str, workers: int, concurrency: int, rpm: int | None, retries: int) -> bool:
+    """Run every unfinished shard; retries shards whose worker crashed. Returns True when all finished."""
+    ctx = multiprocessing.get_context("spawn")  # no SQLite connections or loops inherited from the parent
+    with ctx.Manager() as manager:
+        permits = stop = None
+        if rpm:
+            permits = manager.Queue(maxsize=max(1, min(rpm, workers * concurrency)))
+            stop = threading.Event()
+            threading.Thread(target=refill_permits, args=(permits, rpm, stop), daemon=True).start()
+
+        pending = list(range(len(manifest['shards'])))
+        for attempt in range(retries + 1):
+            crashed = []
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futures = {
+                    pool.submit(run_shard, shard, manifest['shards'][shard], out_dir,
+                                manifest['options'], concurrency, permits): shard
+                    for shard in pending
+                }
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    try:
+                        counts = future.result()
+                        print(f"  ✓ shard {shard}: {counts['completed']} completed, "
+                              f"{counts['failed']} failed, {counts['skipped']} already done")
+                    except Exception as e:  # BrokenProcessPool when a worker dies
+                        print(f"  ✗ shard {shard}: {e or type(e).__name__}")
+                        crashed.append(shard)
+            pending = crashed
+            if not pending:
+                break
+            if attempt < retries:
+                print(f"Retrying {len(pending)} shard(s)...")
+
+        if stop is not None:
+            stop.set()
+    return not pending
+
+
+def summarize_batch(manifest: dict, out_dir: str) -> dict:
+    """Aggregate the latest result of every topic in the manifest."""
+    results = {}
+    for shard in range(len(manifest['shards'])):
+        results.update(load_shard_results(out_dir, shard))
+    topics = [topic for shard in manifest['shards'] for topic in shard]
+    completed = [results[t] for t in topics if t in results and results[t]['error'] is None]
+    failed = [t for t in topics if t in results and results[t]['error'] is not None]
+    prompt = sum(r['usage']['prompt_tokens'] for r in completed)
+    completion = sum(r['usage']['completion_tokens'] for r in completed)
+    return {
+        'topics': len(topics),
+        'completed': len(completed),
+        'failed': failed,
+        'not_run': [t for t in topics if t not in results],
+        'prompt_tokens': prompt,
+        'completion_tokens': completion,
+        'cost_usd': round(sum(r['usage']['cost_usd'] for r in completed), 4),
+        'mean_overall_score': round(sum(r['overall_score'] for r in completed) / len(completed), 1) if completed else None,
+        'mean_seconds': round(sum(r['seconds'] for r in completed) / len(completed), 1) if completed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a large topic batch across worker processes.")
+    parser.add_argument("--topics", help="File with one topic per line (omit to resume --out)")
+    parser.add_argument("--out", required=True, help="Batch directory: manifest, shard results, summary")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes (default: CPU count)")
+    parser.add_argument("--shards", type=int, help="Number of shards (default: 4 per worker)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent runs per worker (default: 4)")
+    parser.add_argument("--rpm", type=int, help="Global model requests per minute across all workers")
+    parser.add_argument("--retries", type=int, default=1, help="Re-runs of shards whose worker crashed (default: 1)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Model backend")
+    parser.add_argument("--no-track-changes", action="store_true", help="Skip diffing against previous runs")
+    args = parser.parse_args()
+
+    options = {'track_changes': not args.no_track_changes}
+    if args.backend:
+        options['backend'] = args.backend
+    topics = load_topics(args.topics) if args.topics else None
+    manifest = load_or_create_manifest(args.out, topics, args.shards or args.workers * 4, options)
+
+    print(f"Running {sum(len(s) for s in manifest['shards'])} topics in {len(manifest['shards'])} shards "
+          f"on {args.workers} workers...")
+    finished = run_batch(manifest, args.out, args.workers, args.concurrency, args.rpm, args.retries)
+    summary = summarize_batch(manifest, args.out)
+    with open(os.path.join(args.out, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"{summary['completed']}/{summary['topics']} topics completed, "
+          f"{summary['prompt_tokens'] + summary['completion_tokens']} tokens, ${summary['cost_usd']:.4f}")
+    if summary['failed'] or summary['not_run'] or not finished:
+        print(f"⚠️ {len(summary['failed'])} failed, {len(summary['not_run'])} not run - "
+              f"re-run with --out {args.out} to resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Backend benchmark: tokens/sec and per-stage latency of the pipeline on each model backend.
+
+Runs the full four-agent pipeline on a fixed topic against each backend and reports,
+per stage, the mean and worst latency and the completion throughput. Use it to compare
+a local OpenAI-compatible server (MODEL_BACKEND=local settings) against the hosted API.
+
+The benchmark runs write to a scratch trend history, run store and result cache, so
+they never show up in the dashboard or skew its "what's changed" diffs.
+
+Usage:
+    python benchmarks/bench_backends.py --backends openai local --runs 3
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set before the pipeline modules are imported, since they open their stores on import
+SCRATCH = tempfile.TemporaryDirectory(prefix="bench_backends_")
+os.environ.update({
+    'TREND_HISTORY_PATH': os.path.join(SCRATCH.name, 'trends.db'),
+    'RUN_STORE_PATH': os.path.join(SCRATCH.name, 'runs.db'),
+    'RESULT_CACHE_PATH': os.path.join(SCRATCH.name, 'results.db'),
+})
+
+from agents import AGENT_NAMES  # noqa: E402
+from model_backends import BACKENDS, get_model_name  # noqa: E402
+from pipeline import stream_agent_messages  # noqa: E402
+
+DEFAULT_TOPIC = "Microsoft Dynamics 365 Copilot updates"
+
+
+async def time_run(topic: str, backend: str) -> list:
+    """Run the pipeline once; return (agent, latency_seconds, completion_tokens) per message."""
+    samples = []
+    last = time.perf_counter()
+    async for message in stream_agent_messages(topic, backend=backend):
+        now = time.perf_counter()
+        samples.append((message['agent'], now - last, message['completion_tokens']))
+        last = now
+    return samples
+
+
+async def bench_backend(topic: str, backend: str, runs: int) -> dict:
+    stages = {name: {'latency': [], 'tokens': 0, 'seconds': 0.0} for name in AGENT_NAMES}
+    for _ in range(runs):
+        for agent, latency, tokens in await time_run(topic, backend):
+            stages[agent]['latency'].append(latency)
+            stages[agent]['tokens'] += tokens
+            stages[agent]['seconds'] += latency
+    return stages
+
+
+def print_report(backend: str, stages: dict):
+    print(f"\n== {backend} ({get_model_name(backend)}) ==")
+    print(f"{'Stage':<16} {'n':>3} {'mean s':>8} {'max s':>8} {'tok/s':>8}")
+    total_tokens = total_seconds = 0
+    for name, stage in stages.items():
+        if not stage['latency']:
+            print(f"{name:<16} {0:>3} {'-':>8} {'-':>8} {'-':>8}")
+            continue
+        tps = stage['tokens'] / stage['seconds'] if stage['seconds'] else 0.0
+        print(f"{name:<16} {len(stage['latency']):>3} {statistics.mean(stage['latency']):>8.1f} "
+              f"{max(stage['latency']):>8.1f} {tps:>8.1f}")
+        total_tokens += stage['tokens']
+        total_seconds += stage['seconds']
+    if total_seconds:
+        print(f"{'overall':<16} {'':>3} {'':>8} {'':>8} {total_tokens / total_seconds:>8.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare model backends on the ERP trend pipeline.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--topic", default=DEFAULT_TOPIC)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        print_report(backend, await bench_backend(args.topic, backend, args.runs))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
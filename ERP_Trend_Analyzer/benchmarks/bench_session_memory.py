@@ -0,0 +1,102 @@
+"""
+Memory benchmark: per-session footprint of the dashboard's session state.
+
+Simulates N connected sessions, each holding one finished four-agent run, and compares
+the old layout (full transcripts in `results` and `agent_outputs`) with the current one
+(run ID plus lightweight metadata, content in the shared run store).
+
+Usage:
+    python benchmarks/bench_session_memory.py --sessions 100
+"""
+
+import argparse
+import gc
+import os
+import random
+import string
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import AGENT_NAMES  # noqa: E402
+from run_store import RunStore  # noqa: E402
+
+# Typical output sizes (characters) of each agent
+OUTPUT_SIZES = {'TrendCollector': 5000, 'ContentWriter': 6000, 'SEOOptimizer': 9000, 'FactChecker': 3000}
+
+
+def fake_output(size: int) -> str:
+    words = (''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 10))) for _ in range(size))
+    return ' '.join(words)[:size]
+
+
+def fake_run() -> list:
+    return [{'agent': a, 'content': fake_output(OUTPUT_SIZES[a]), 'timestamp': '09:00:00'} for a in AGENT_NAMES]
+
+
+def legacy_session(messages: list) -> dict:
+    return {
+        'results': messages,
+        'agent_outputs': {m['agent']: m['content'] for m in messages},
+        'is_running': False,
+        'completed_agents': [0, 1, 2, 3],
+        'current_agent': -1,
+    }
+
+
+def slim_session(store: RunStore, topic: str, messages: list) -> dict:
+    run_id = store.create_run(topic)
+    for message in messages:
+        store.append_message(run_id, message)
+    store.finish_run(run_id, 'complete')
+    return {
+        'run_id': run_id,
+        'is_running': False,
+        'completed_agents': [0, 1, 2, 3],
+        'current_agent': -1,
+        'flight': None,
+        'run_notice': None,
+    }
+
+
+def rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure(label: str, build, sessions: int):
+    gc.collect()
+    tracemalloc.start()
+    rss_before = rss_bytes()
+    state = [build(i) for i in range(sessions)]
+    gc.collect()
+    rss_after = rss_bytes()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} sessions={len(state):<5} "
+          f"traced/session={traced / sessions / 1024:8.1f} KiB   "
+          f"RSS/session={(rss_after - rss_before) / sessions / 1024:8.1f} KiB")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+
+    random.seed(0)
+    runs = [fake_run() for _ in range(args.sessions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunStore(os.path.join(tmp, 'runs.db'))
+        # Copy contents so each legacy session owns its strings, as separate reruns would
+        legacy = measure("legacy", lambda i: legacy_session([dict(m, content=m['content'] + ' ') for m in runs[i]]),
+                         args.sessions)
+        del legacy
+        measure("slim", lambda i: slim_session(store, f"topic {i}", runs[i]), args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+ERP Trend Agent - Quality vs. Latency Evaluation
+Runs the pipeline over a fixed topic corpus for one or more configurations, in
+parallel, and compares credibility scores, word counts, tokens, cost and stage
+timings between them. Every run is recorded, so a later invocation can re-score and
+compare recordings (e.g. from before and after a prompt or model change) without
+calling the model again.
+
+Usage:
+    python evaluate.py --config baseline --config local          # live, recorded to eval/results/
+    python evaluate.py --config baseline --out eval/results/new-prompt
+    python evaluate.py --recorded eval/results/old eval/results/new-prompt
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from datetime import datetime
+
+from agents import AGENT_NAMES
+from model_backends import get_model_name
+from pipeline import stream_agent_messages, summarize_usage
+from prewarm import load_topics
+from scoring import calculate_overall_score, extract_scores_from_response
+from trend_history import TrendHistory
+
+EVAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval")
+DEFAULT_CORPUS = os.path.join(EVAL_DIR, "topics.txt")
+DEFAULT_CONFIGS = os.path.join(EVAL_DIR, "configs.json")
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+async def run_one(topic: str, options: dict, semaphore: asyncio.Semaphore) -> dict:
+    """Run the pipeline once and record its messages with per-message latency."""
+    async with semaphore:
+        messages, error = [], None
+        started = last = time.perf_counter()
+        try:
+            # A scratch history per run, so every run sees the topic for the first time
+            async for message in stream_agent_messages(topic, history=TrendHistory(":memory:"), **options):
+                now = time.perf_counter()
+                messages.append({**message, 'latency': round(now - last, 3)})
+                last = now
+        except Exception as e:
+            error = str(e)
+        return {
+            'topic': topic,
+            'messages': messages,
+            'error': error,
+            'total_seconds': round(time.perf_counter() - started, 3),
+        }
+
+
+def score_run(record: dict, model: str | None = None) -> dict:
+    """Scores, word counts, tokens, cost and stage timings of one recorded run."""
+    outputs = {m['agent']: m['content'] for m in record['messages']}
+    scores = extract_scores_from_response(outputs.get('FactChecker', ''))
+    stage_seconds = {name: 0.0 for name in AGENT_NAMES}
+    for message in record['messages']:
+        stage_seconds[message['agent']] += message['latency']
+    return {
+        'complete': record['error'] is None and 'FactChecker' in outputs,
+        'scores': scores,
+        'overall_score': calculate_overall_score(scores),
+        'article_words': len(outputs.get('ContentWriter', '').split()),
+        'total_words': sum(len(text.split()) for text in outputs.values()),
+        'usage': summarize_usage(record['messages'], model),
+        'stage_seconds': stage_seconds,
+        'total_seconds': record['total_seconds'],
+    }
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summarize_config(results: list) -> dict:
+    """Aggregate per-run results of one configuration."""
+    complete = [r for r in results if r['complete']] or results
+    mean = lambda key: round(statistics.mean(r[key] for r in complete), 1)  # noqa: E731
+    latencies = [r['total_seconds'] for r in complete]
+    return {
+        'runs': len(results),
+        'complete': sum(r['complete'] for r in results),
+        'overall_score': mean('overall_score'),
+        'article_words': mean('article_words'),
+        'total_words': mean('total_words'),
+        'tokens': round(statistics.mean(
+            r['usage']['prompt_tokens'] + r['usage']['completion_tokens'] for r in complete)),
+        'cost_usd': round(statistics.mean(r['usage']['cost_usd'] for r in complete), 4),
+        'p50_seconds': round(percentile(latencies, 50), 1),
+        'p95_seconds': round(percentile(latencies, 95), 1),
+        'stage_seconds': {
+            name: round(statistics.mean(r['stage_seconds'][name] for r in complete), 1)
+            for name in AGENT_NAMES
+        },
+    }
+
+
+def write_records(out_dir: str, config: str, options: dict, records: list):
+    config_dir = os.path.join(out_dir, config)
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({**options, 'model': get_model_name(options.get('backend'))}, f, indent=2)
+    for record in records:
+        with open(os.path.join(config_dir, f"{slugify(record['topic'])}.json"), "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+
+
+def load_records(path: str) -> dict:
+    """Load recorded runs: {config: (model, [record, ...])} from a results directory."""
+    recorded = {}
+    for config in sorted(os.listdir(path)):
+        config_dir = os.path.join(path, config)
+        if not os.path.isfile(os.path.join(config_dir, "config.json")):
+            continue
+        with open(os.path.join(config_dir, "config.json"), encoding="utf-8") as f:
+            model = json.load(f).get('model')
+        records = []
+        for name in sorted(os.listdir(config_dir)):
+            if name.endswith(".json") and name != "config.json":
+                with open(os.path.join(config_dir, name), encoding="utf-8") as f:
+                    records.append(json.load(f))
+        recorded[config] = (model, records)
+    return recorded
+
+
+def print_comparison(summaries: dict):
+    stage_header = " ".join(f"{name[:8]:>8}" for name in AGENT_NAMES)
+    print(f"{'Config':<28} {'Done':>6} {'Score':>6} {'Words':>6} {'Tokens':>7} {'Cost $':>7} "
+          f"{'p50 s':>6} {'p95 s':>6} {stage_header}")
+    for config, s in summaries.items():
+        stages = " ".join(f"{s['stage_seconds'][name]:>8.1f}" for name in AGENT_NAMES)
+        print(f"{config[:28]:<28} {s['complete']:>3}/{s['runs']:<2} {s['overall_score']:>6.1f} "
+              f"{s['article_words']:>6.0f} {s['tokens']:>7} {s['cost_usd']:>7.4f} "
+              f"{s['p50_seconds']:>6.1f} {s['p95_seconds']:>6.1f} {stages}")
+
+
+async def evaluate(topics: list, configs: dict, concurrency: int) -> dict:
+    """Run every topic under every configuration; returns {config: [record, ...]}."""
+    semaphore = asyncio.Semaphore(concurrency)
+    runs = {
+        config: asyncio.gather(*(run_one(topic, options, semaphore) for topic in topics))
+        for config, options in configs.items()
+    }
+    return dict(zip(runs, await asyncio.gather(*runs.values())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quality, cost and latency of pipeline configurations.")
+    parser.add_argument("--config", action="append", help="Configuration name from --configs, repeatable (default: all)")
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS, help="JSON file of named team options")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="File with one topic per line")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent runs (default: 4)")
+    parser.add_argument("--out", help="Where to record runs (default: eval/results/<timestamp>)")
+    parser.add_argument("--recorded", nargs="+", metavar="DIR", help="Compare recorded results instead of running")
+    args = parser.parse_args()
+
+    if args.recorded:
+        summaries = {}
+        for path in args.recorded:
+            for config, (model, records) in load_records(path).items():
+                label = f"{os.path.basename(os.path.normpath(path))}/{config}"
+                summaries[label] = summarize_config([score_run(r, model) for r in records])
+        print_comparison(summaries)
+        return
+
+    with open(args.configs, encoding="utf-8") as f:
+        available = json.load(f)
+    names = args.config or list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown configuration(s): {', '.join(unknown)}")
+    configs = {name: available[name] for name in names}
+
+    topics = load_topics(args.corpus)
+    out_dir = args.out or os.path.join(EVAL_DIR, "results", datetime.now().strftime("%Y%m%d-%H%M%S"))
+    print(f"Evaluating {len(configs)} configuration(s) on {len(topics)} topics...")
+    recorded = asyncio.run(evaluate(topics, configs, args.concurrency))
+
+    summaries = {}
+    for config, records in recorded.items():
+        write_records(out_dir, config, configs[config], records)
+        model = get_model_name(configs[config].get('backend'))
+        summaries[config] = summarize_config([score_run(r, model) for r in records])
+        for record in records:
+            if record['error']:
+                print(f"⚠️ {config} / {record['topic']}: {record['error']}")
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    print_comparison(summaries)
+    print(f"Runs recorded to {out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Structured event log of pipeline runs.
+Every run start, agent message and run end is appended as one JSON line with run ID,
+agent, timing, tokens and a content hash (the content itself lives in the run store).
+log() only enqueues; a background thread batches the writes, so logging never blocks
+the event loop. Query it with events.py.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+EVENT_LOG_PATH = os.getenv("EVENT_LOG_PATH", os.path.join(".cache", "events.jsonl"))
+EVENT_LOG_ENABLED = os.getenv("EVENT_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_STOP = object()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class EventLog:
+    """Append-only JSONL event log with buffered writes on a background thread."""
+
+    def __init__(self, path: str = EVENT_LOG_PATH, enabled: bool = EVENT_LOG_ENABLED,
+                 flush_interval: float = 1.0, batch_size: int = 256):
+        self.path = path
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def log(self, event: dict):
+        """Record an event; returns immediately."""
+        if not self.enabled:
+            return
+        if self._writer is None:
+            self._start()
+        self._queue.put({'ts': round(time.time(), 3), **event})
+
+    def _start(self):
+        with self._lock:
+            if self._writer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._writer = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _write_loop(self):
+        # Several processes (e.g. batch.py workers) append to one log: each batch goes out
+        # in a single write() on an O_APPEND descriptor, so their lines never interleave
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(event is _STOP for event in batch)
+                data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch if e is not _STOP)
+                if data:
+                    os.write(fd, data.encode("utf-8"))
+                if stop:
+                    return
+        finally:
+            os.close(fd)
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending events and stop the writer thread."""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._queue.put(_STOP)
+            writer.join(timeout)
+        self._writer = None
+
+
+def read_events(path: str = EVENT_LOG_PATH):
+    """Yield logged events in order, skipping a trailing line cut short by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
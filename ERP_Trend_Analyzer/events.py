@@ -0,0 +1,120 @@
+"""
+ERP Trend Agent - Event Log Queries
+Postmortems on slow or expensive runs from the structured event log, without
+reproducing them.
+
+Usage:
+    python events.py --slowest 10            # longest runs
+    python events.py --expensive 10 --hours 24
+    python events.py --agents                # per-agent latency and token statistics
+    python events.py --run <run_id>          # timeline of one run
+"""
+
+import argparse
+import statistics
+import time
+
+from agents import estimate_cost
+from event_log import EVENT_LOG_PATH, read_events
+from model_backends import get_model_name
+
+
+def load_runs(path: str, since: float = 0.0) -> dict:
+    """Group events into runs: {run_id: {'start', 'end', 'messages'}}."""
+    runs = {}
+    for event in read_events(path):
+        if event.get('ts', 0) < since:
+            continue
+        run = runs.setdefault(event['run_id'], {'start': None, 'end': None, 'messages': []})
+        if event['event'] == 'run_start':
+            run['start'] = event
+        elif event['event'] == 'run_end':
+            run['end'] = event
+        else:
+            run['messages'].append(event)
+    return runs
+
+
+def run_model(start: dict) -> str:
+    """The model a run used; runs logged before the model was recorded fall back to their backend's."""
+    return start.get('model') or get_model_name((start.get('options') or {}).get('backend'))
+
+
+def run_row(run_id: str, run: dict) -> dict:
+    start, end = run['start'] or {}, run['end'] or {}
+    prompt = sum(m['prompt_tokens'] for m in run['messages'])
+    completion = sum(m['completion_tokens'] for m in run['messages'])
+    return {
+        'run_id': run_id,
+        'topic': start.get('topic', '?'),
+        'status': end.get('status', 'running'),
+        'seconds': end.get('seconds') or (run['messages'][-1]['elapsed'] if run['messages'] else 0.0),
+        'messages': len(run['messages']),
+        'tokens': prompt + completion,
+        'cost_usd': estimate_cost(prompt, completion, run_model(start)),
+        'started': time.strftime('%Y-%m-%d %H:%M', time.localtime(start['ts'])) if start else '?',
+    }
+
+
+def print_runs(rows: list):
+    print(f"{'Run ID':<34} {'Started':<16} {'Status':<10} {'Secs':>7} {'Msgs':>5} {'Tokens':>7} {'Cost $':>7}  Topic")
+    for r in rows:
+        print(f"{r['run_id']:<34} {r['started']:<16} {r['status']:<10} {r['seconds']:>7.1f} {r['messages']:>5} "
+              f"{r['tokens']:>7} {r['cost_usd']:>7.4f}  {r['topic'][:40]}")
+
+
+def print_timeline(run_id: str, run: dict):
+    row = run_row(run_id, run)
+    print(f"Run {run_id}: {row['topic']} ({row['status']}, {row['seconds']:.1f}s, {row['tokens']} tokens, "
+          f"{run_model(run['start'] or {})}, ${row['cost_usd']:.4f})")
+    if run['start'] and run['start'].get('options'):
+        print(f"Options: {run['start']['options']}")
+    print(f"{'Elapsed':>8} {'Latency':>8} {'Agent':<16} {'Prompt':>7} {'Compl.':>7} {'Chars':>7}  Hash")
+    for m in run['messages']:
+        print(f"{m['elapsed']:>8.1f} {m['latency']:>8.1f} {m['agent']:<16} {m['prompt_tokens']:>7} "
+              f"{m['completion_tokens']:>7} {m['chars']:>7}  {m['content_hash']}")
+
+
+def print_agent_stats(runs: dict):
+    by_agent = {}
+    for run in runs.values():
+        for m in run['messages']:
+            by_agent.setdefault(m['agent'], []).append(m)
+    print(f"{'Agent':<16} {'Turns':>6} {'p50 s':>7} {'p95 s':>7} {'max s':>7} {'Avg prompt':>11} {'Avg compl.':>11}")
+    for agent, messages in sorted(by_agent.items()):
+        latencies = sorted(m['latency'] for m in messages)
+        p95 = latencies[min(len(latencies) - 1, round(0.95 * (len(latencies) - 1)))]
+        print(f"{agent:<16} {len(messages):>6} {statistics.median(latencies):>7.1f} {p95:>7.1f} "
+              f"{latencies[-1]:>7.1f} {statistics.mean(m['prompt_tokens'] for m in messages):>11.0f} "
+              f"{statistics.mean(m['completion_tokens'] for m in messages):>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the pipeline event log.")
+    parser.add_argument("--log", default=EVENT_LOG_PATH, help=f"Event log file (default: {EVENT_LOG_PATH})")
+    parser.add_argument("--hours", type=float, help="Only consider events from the last N hours")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--run", help="Show the timeline of one run")
+    query.add_argument("--slowest", type=int, metavar="N", help="List the N slowest runs (default: 10)")
+    query.add_argument("--expensive", type=int, metavar="N", help="List the N most expensive runs")
+    query.add_argument("--agents", action="store_true", help="Per-agent latency and token statistics")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else 0.0
+    runs = load_runs(args.log, since)
+
+    if args.run:
+        if args.run not in runs:
+            raise SystemExit(f"Run {args.run} not found in {args.log}")
+        print_timeline(args.run, runs[args.run])
+    elif args.agents:
+        print_agent_stats(runs)
+    else:
+        rows = [run_row(run_id, run) for run_id, run in runs.items()]
+        key = 'cost_usd' if args.expensive else 'seconds'
+        rows.sort(key=lambda r: r[key], reverse=True)
+        print_runs(rows[:args.expensive or args.slowest or 10])
+
+
+if __name__ == "__main__":
+    main()
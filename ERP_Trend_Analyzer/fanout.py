@@ -0,0 +1,81 @@
+"""
+ERP Trend Agent - Multi-language / Multi-region Batch Reports
+Runs TrendCollector once and the writing, SEO and fact-checking chain concurrently
+for each requested language/region variant, then writes one report per variant
+and prints a combined cost report.
+
+Usage:
+    python fanout.py "SAP S/4HANA Cloud trends" \
+        --variant German:DACH --variant French:France --variant English:India \
+        --out reports/
+
+    # Research on the hosted API, drafts on a local OpenAI-compatible server
+    python fanout.py "Oracle NetSuite AI" --variant Spanish:LATAM \
+        --research-backend openai --backend local
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+
+from model_backends import BACKENDS
+from pipeline import run_fanout
+
+
+def parse_variant(spec: str) -> dict:
+    """Parse 'Language:Region' (region optional) into a variant dict."""
+    language, _, region = spec.partition(':')
+    language = language.strip() or 'English'
+    region = region.strip() or 'Global'
+    name = re.sub(r'[^a-z0-9]+', '-', f"{language}-{region}".lower()).strip('-')
+    return {'name': name, 'language': language, 'region': region}
+
+
+def write_reports(result: dict, out_dir: str):
+    """Write the shared research, each variant's final output, and the cost report."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "research.md"), "w", encoding="utf-8") as f:
+        f.write(result['research']['content'])
+    for name, variant in result['variants'].items():
+        with open(os.path.join(out_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+            for message in variant['messages']:
+                f.write(f"## {message['agent']}\n\n{message['content']}\n\n")
+    with open(os.path.join(out_dir, "cost_report.json"), "w", encoding="utf-8") as f:
+        json.dump(result['cost_report'], f, indent=2)
+
+
+def print_cost_report(result: dict):
+    report = result['cost_report']
+    print(f"{'Stage':<30} {'Prompt':>9} {'Completion':>11} {'Cost (USD)':>11}")
+    rows = [('research (shared)', report['research'])]
+    rows += [(f"variant {name}", usage) for name, usage in report['variants'].items()]
+    rows.append(('TOTAL', report['total']))
+    for label, usage in rows:
+        print(f"{label:<30} {usage['prompt_tokens']:>9} {usage['completion_tokens']:>11} {usage['cost_usd']:>11.4f}")
+    for name, variant in result['variants'].items():
+        if variant['error']:
+            print(f"⚠️ {name} failed: {variant['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate ERP trend reports for several languages/regions.")
+    parser.add_argument("topic", nargs="?", default="", help="Topic (default: general ERP trends)")
+    parser.add_argument("--variant", action="append", required=True, help="Language:Region, repeatable")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports/)")
+    parser.add_argument("--research-backend", choices=sorted(BACKENDS), help="Model backend for TrendCollector")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Model backend for the per-variant chains")
+    args = parser.parse_args()
+
+    variants = [parse_variant(spec) for spec in args.variant]
+    result = asyncio.run(run_fanout(
+        args.topic, variants, research_backend=args.research_backend, backend=args.backend
+    ))
+    write_reports(result, args.out)
+    print_cost_report(result)
+    print(f"Reports written to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
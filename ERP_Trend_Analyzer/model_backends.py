@@ -0,0 +1,149 @@
+"""
+Model backends for the agent pipeline.
+'openai' is the hosted OpenAI API; 'local' is an OpenAI-compatible server on the
+network (llama.cpp server, vLLM, ...). The backend is selected by config and each
+backend has its own concurrency limit, shared by every client created for it.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+
+from dotenv import load_dotenv
+from autogen_core.models import ChatCompletionClient, ModelFamily
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+from tracing import span
+
+load_dotenv()
+
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "openai")
+
+BACKENDS = {
+    "openai": {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "api_key": os.getenv("OPENAI_API_KEY", ""),
+        "base_url": None,
+        "max_concurrency": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    },
+    "local": {
+        "model": os.getenv("LOCAL_MODEL_NAME", "local-model"),
+        "api_key": os.getenv("LOCAL_MODEL_API_KEY", "not-needed"),
+        "base_url": os.getenv("LOCAL_MODEL_BASE_URL", "http://localhost:8080/v1"),
+        "max_concurrency": int(os.getenv("LOCAL_MAX_CONCURRENCY", "2")),
+    },
+}
+
+# Local models are plain chat models; don't assume tools, vision or JSON mode
+LOCAL_MODEL_INFO = {
+    "vision": False,
+    "function_calling": False,
+    "json_output": False,
+    "family": ModelFamily.UNKNOWN,
+}
+
+# backend -> {event loop: semaphore}; asyncio semaphores are bound to one loop
+_limiters = {name: weakref.WeakKeyDictionary() for name in BACKENDS}
+
+
+def get_backend_config(backend: str | None = None) -> dict:
+    backend = backend or MODEL_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend]
+
+
+def get_model_name(backend: str | None = None) -> str:
+    return get_backend_config(backend)["model"]
+
+
+class ConcurrencyLimitedClient(ChatCompletionClient):
+    """
+    Delegating model client that caps in-flight requests per backend and event loop.
+    An optional rate_limiter (any object with `async acquire()`) is awaited before each
+    request, e.g. to share a requests-per-minute budget between processes.
+    """
+
+    def __init__(self, client: ChatCompletionClient, backend: str, max_concurrency: int, rate_limiter=None):
+        self._client = client
+        self._backend = backend
+        self._max_concurrency = max_concurrency
+        self._rate_limiter = rate_limiter
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphores = _limiters[self._backend]
+        semaphore = semaphores.get(loop)
+        if semaphore is None:
+            semaphore = semaphores[loop] = asyncio.Semaphore(self._max_concurrency)
+        return semaphore
+
+    async def create(self, messages, **kwargs):
+        model = BACKENDS[self._backend]['model']
+        with span("model.request", backend=self._backend, model=model) as request:
+            queued = time.perf_counter()
+            async with self._semaphore():
+                if self._rate_limiter is not None:
+                    await self._rate_limiter.acquire()
+                request.set_attribute('queue_ms', round((time.perf_counter() - queued) * 1000, 1))
+                result = await self._client.create(messages, **kwargs)
+            request.set_attributes(prompt_tokens=result.usage.prompt_tokens,
+                                   completion_tokens=result.usage.completion_tokens)
+            return result
+
+    async def create_stream(self, messages, **kwargs):
+        model = BACKENDS[self._backend]['model']
+        with span("model.request", backend=self._backend, model=model, stream=True) as request:
+            queued = time.perf_counter()
+            async with self._semaphore():
+                if self._rate_limiter is not None:
+                    await self._rate_limiter.acquire()
+                request.set_attribute('queue_ms', round((time.perf_counter() - queued) * 1000, 1))
+                async for chunk in self._client.create_stream(messages, **kwargs):
+                    if not isinstance(chunk, str):
+                        request.set_attributes(prompt_tokens=chunk.usage.prompt_tokens,
+                                               completion_tokens=chunk.usage.completion_tokens)
+                    yield chunk
+
+    def actual_usage(self):
+        return self._client.actual_usage()
+
+    def total_usage(self):
+        return self._client.total_usage()
+
+    def count_tokens(self, messages, **kwargs) -> int:
+        return self._client.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages, **kwargs) -> int:
+        return self._client.remaining_tokens(messages, **kwargs)
+
+    async def close(self):
+        """Close the wrapped client's HTTP connection pool before its event loop ends."""
+        http_client = getattr(self._client, '_client', None)
+        if http_client is not None and hasattr(http_client, 'close'):
+            await http_client.close()
+
+    @property
+    def capabilities(self):
+        return self._client.capabilities
+
+    @property
+    def model_info(self):
+        return self._client.model_info
+
+
+def create_model_client(backend: str | None = None, rate_limiter=None) -> ChatCompletionClient:
+    """Create a concurrency-limited model client for the given (or configured) backend."""
+    backend = backend or MODEL_BACKEND
+    config = get_backend_config(backend)
+    if backend == "openai":
+        client = OpenAIChatCompletionClient(model=config["model"], api_key=config["api_key"])
+    else:
+        client = OpenAIChatCompletionClient(
+            model=config["model"],
+            api_key=config["api_key"],
+            base_url=config["base_url"],
+            model_info=LOCAL_MODEL_INFO,
+        )
+    return ConcurrencyLimitedClient(client, backend, config["max_concurrency"], rate_limiter)
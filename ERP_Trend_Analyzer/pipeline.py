@@ -0,0 +1,521 @@
+"""
+Pipeline runner shared by the Streamlit UI, the HTTP server and batch tools.
+Builds the task prompt and streams per-agent messages from the team as they arrive,
+and provides the fan-out mode that shares one research stage across report variants.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from autogen_core import CancellationToken
+
+from agents import (
+    AGENT_NAMES,
+    create_agent_team,
+    create_content_writer_agent,
+    create_downstream_team,
+    create_fact_checker_agent,
+    create_trend_collector_agent,
+    estimate_cost,
+    get_model_client,
+)
+from event_log import EventLog, content_hash
+from model_backends import get_model_name
+from result_cache import ResultCache
+from run_store import RunStore, new_run_id
+from scoring import calculate_overall_score, extract_flagged_issues, extract_scores_from_response
+from singleflight import SingleFlight
+from tracing import span
+from trend_history import TrendHistory, diff_findings, extract_findings, format_diff_focus
+
+DEFAULT_TOPIC = "Latest ERP Industry Trends and Developments"
+
+# Revision mode: drafts scoring below this go back to ContentWriter for a targeted rewrite
+REVISION_MIN_SCORE = 80.0
+REVISION_MAX_ITERATIONS = 2
+
+# Shared on-disk stores (safe across threads and processes)
+result_cache = ResultCache()
+run_store = RunStore()
+trend_history = TrendHistory()
+event_log = EventLog()
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalize a topic so equivalent requests map to the same run."""
+    return " ".join((topic or DEFAULT_TOPIC).split()).lower()
+
+
+def run_key(topic: str, **config) -> str:
+    """Key identifying a run: normalized topic plus team configuration."""
+    return json.dumps([normalize_topic(topic), config], sort_keys=True, default=str)
+
+
+def build_task(topic: str) -> str:
+    """Build the task prompt handed to the team."""
+    task_topic = topic if topic else DEFAULT_TOPIC
+    current_date = datetime.now().strftime('%B %d, %Y')
+    return f"""📅 **TODAY'S DATE: {current_date}**
+
+Analyze the following topic for CURRENT and FUTURE trending news. Create optimized content.
+
+⚠️ CRITICAL: Focus ONLY on:
+- What's happening RIGHT NOW (December 2025)
+- What's coming in 2026 and beyond
+- DO NOT discuss past events or outdated trends
+
+TOPIC: {task_topic}
+
+Please work through the complete workflow:
+1. TrendCollector: Research and identify the LATEST (2025) and UPCOMING (2026) trends
+2. ContentWriter: Create engaging, forward-looking content
+3. SEOOptimizer: Optimize with current year keywords (2025, 2026)
+4. FactChecker: Verify accuracy and TIMELINESS (must be current/future, not past)
+
+Begin the analysis now - remember we are at the END of 2025!"""
+
+
+async def stream_messages(runnable, task: str, cancellation_token=None):
+    """
+    Yield one dict per agent message from a team's or agent's run_stream():
+    {'agent', 'content', 'timestamp', 'prompt_tokens', 'completion_tokens'}.
+
+    Cancelling the token stops the in-flight model call; the stream then ends quietly
+    after the messages already yielded.
+    """
+    try:
+        async for message in runnable.run_stream(task=task, cancellation_token=cancellation_token):
+            if hasattr(message, 'source') and hasattr(message, 'content'):
+                source = message.source
+                content = message.content
+                if source and isinstance(content, str) and content and source in AGENT_NAMES:
+                    usage = getattr(message, 'models_usage', None)
+                    yield {
+                        'agent': source,
+                        'content': content,
+                        'timestamp': datetime.now().strftime('%H:%M:%S'),
+                        'prompt_tokens': usage.prompt_tokens if usage else 0,
+                        'completion_tokens': usage.completion_tokens if usage else 0,
+                    }
+    except asyncio.CancelledError:
+        if cancellation_token is None or not cancellation_token.is_cancelled():
+            raise
+
+
+def remaining_budget(team_options: dict, spent_messages: list, elapsed: float, model: str | None = None):
+    """
+    team_options with the run-wide limits (max_total_tokens, max_cost_usd,
+    timeout_seconds, max_messages) reduced by what an earlier stage used, so the stages
+    of one run share a single budget and deadline. None once any limit is used up.
+    """
+    usage = summarize_usage(spent_messages, model)
+    spent = {
+        'max_total_tokens': usage['prompt_tokens'] + usage['completion_tokens'],
+        'max_cost_usd': usage['cost_usd'],
+        'timeout_seconds': elapsed,
+        'max_messages': len(spent_messages),
+    }
+    options = dict(team_options)
+    for key, used in spent.items():
+        if options.get(key) is not None:
+            options[key] = options[key] - used
+            if options[key] <= 0:
+                return None
+    return options
+
+
+async def _stream_stages(
+    topic: str,
+    cancellation_token=None,
+    run_id: str | None = None,
+    track_changes: bool = True,
+    history: TrendHistory | None = None,
+    **team_options,
+):
+    if not track_changes:
+        team = await create_agent_team(**team_options)
+        async for message in stream_messages(team, build_task(topic), cancellation_token):
+            yield message
+        return
+
+    model_client = team_options.pop('model_client', None) or get_model_client(team_options.get('backend'))
+    research_agent = create_trend_collector_agent(model_client)
+    # The research call gets its own token so the run's timeout_seconds can stop it too
+    research_token = CancellationToken()
+    if cancellation_token is not None:
+        cancellation_token.add_callback(research_token.cancel)
+    started = time.monotonic()
+    timeout = team_options.get('timeout_seconds')
+    timer = asyncio.get_running_loop().call_later(timeout, research_token.cancel) if timeout is not None else None
+    research = []
+    try:
+        async for message in stream_messages(research_agent, build_task(topic), research_token):
+            research.append(message)
+            yield message
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if not research or research_token.is_cancelled():
+        return
+    report = research[-1]['content']
+
+    topic_key = normalize_topic(topic)
+    findings = extract_findings(report)
+    history = history or trend_history
+    previous = history.latest(topic_key)
+    diff = diff_findings(previous, findings) if previous is not None else None
+    history.record(run_id, topic_key, findings, diff)
+
+    downstream_options = remaining_budget(
+        team_options, research, time.monotonic() - started, get_model_name(team_options.get('backend'))
+    )
+    if downstream_options is None:
+        return
+    team = await create_downstream_team(model_client=model_client, **downstream_options)
+    focus = format_diff_focus(diff) if diff is not None else None
+    async for message in stream_messages(team, build_downstream_task(topic, report, focus=focus), cancellation_token):
+        yield message
+
+
+async def stream_agent_messages(
+    topic: str,
+    cancellation_token=None,
+    run_id: str | None = None,
+    track_changes: bool = True,
+    history: TrendHistory | None = None,
+    max_revisions: int = 0,
+    revision_max_cost_usd: float | None = None,
+    **team_options,
+):
+    """
+    Run the four agents on a topic and yield their messages (see stream_messages).
+    team_options are passed to the team factories in agents.py.
+
+    With track_changes, TrendCollector runs first on its own. Its findings are stored
+    per topic under run_id and diffed against the previous run of the topic, and the
+    diff is handed to the ContentWriter -> SEOOptimizer -> FactChecker team as a
+    "what's new" focus. Both stages share one budget: the token, cost, message and
+    timeout limits in team_options cover the whole run (see remaining_budget). Without
+    track_changes, the original four-agent round robin runs.
+    history overrides the shared trend history, e.g. with a scratch one for evaluations.
+    With max_revisions, a draft the FactChecker scores low is revised afterwards (see
+    revise_draft). Every run and message is recorded in the event log under run_id.
+    """
+    run_id = run_id or new_run_id()
+    options = {k: v for k, v in team_options.items() if isinstance(v, (str, int, float, bool))}
+    stages = _stream_stages(topic, cancellation_token, run_id, track_changes, history, **team_options)
+    if max_revisions:
+        stages = _with_revisions(
+            stages, topic, max_revisions, revision_max_cost_usd, cancellation_token,
+            model_client=team_options.get('model_client'), backend=team_options.get('backend'),
+        )
+    with span("pipeline.run", run_id=run_id, topic=normalize_topic(topic), **options) as run:
+        count = 0
+        async for message in log_run(
+            stages, run_id, topic, cancellation_token, get_model_name(team_options.get('backend')),
+            track_changes=track_changes, options=options,
+        ):
+            count += 1
+            run.set_attribute('messages', count)
+            yield message
+
+
+async def log_run(messages, run_id: str, topic: str, cancellation_token=None, model: str | None = None, **fields):
+    """
+    Pass a run's message stream through, recording run_start (with the model the run
+    uses, so events.py prices it correctly), one event per message (timing, tokens,
+    content hash) and run_end with the final status in the event log.
+    """
+    started = last = time.monotonic()
+    event_log.log({
+        'event': 'run_start', 'run_id': run_id, 'topic': normalize_topic(topic),
+        'model': model or get_model_name(), **fields,
+    })
+    count = prompt_tokens = completion_tokens = 0
+    status = 'failed'
+    try:
+        async for message in messages:
+            now = time.monotonic()
+            event_log.log({
+                'event': 'message', 'run_id': run_id, 'agent': message['agent'],
+                'latency': round(now - last, 3), 'elapsed': round(now - started, 3),
+                'prompt_tokens': message['prompt_tokens'], 'completion_tokens': message['completion_tokens'],
+                'chars': len(message['content']), 'content_hash': content_hash(message['content']),
+            })
+            last = now
+            count += 1
+            prompt_tokens += message['prompt_tokens']
+            completion_tokens += message['completion_tokens']
+            yield message
+        cancelled = cancellation_token is not None and cancellation_token.is_cancelled()
+        status = 'cancelled' if cancelled else 'complete'
+    except GeneratorExit:
+        status = 'abandoned'
+        raise
+    finally:
+        event_log.log({
+            'event': 'run_end', 'run_id': run_id, 'status': status,
+            'seconds': round(time.monotonic() - started, 3), 'messages': count,
+            'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+        })
+
+
+def summarize_usage(messages: list, model: str | None = None) -> dict:
+    """Total tokens and estimated USD cost of a list of message dicts."""
+    prompt_tokens = sum(m.get('prompt_tokens', 0) for m in messages)
+    completion_tokens = sum(m.get('completion_tokens', 0) for m in messages)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cost_usd': round(estimate_cost(prompt_tokens, completion_tokens, model), 6),
+    }
+
+
+def build_downstream_task(topic: str, research: str, variant: dict | None = None, focus: str | None = None) -> str:
+    """
+    Task for a ContentWriter -> SEOOptimizer -> FactChecker chain that works from an
+    existing TrendCollector report, optionally for a language/region variant and with
+    a "what's new" focus from trend diffing.
+    """
+    task_topic = topic if topic else DEFAULT_TOPIC
+    sections = [f"""📅 **TODAY'S DATE: {datetime.now().strftime('%B %d, %Y')}**
+
+TOPIC: {task_topic}
+
+The TrendCollector has already researched this topic. Its report is below.
+
+--- TREND COLLECTOR REPORT ---
+{research}
+--- END OF REPORT ---"""]
+
+    if focus:
+        sections.append(f"""{focus}
+
+ContentWriter: readers have seen the previous report. Lead with what is new or changed
+and keep unchanged trends short (target 300-500 words).""")
+
+    if variant:
+        sections.append(f"""🌍 TARGET AUDIENCE:
+- Language: {variant.get('language', 'English')} (write the entire article, SEO metadata and credibility report in this language)
+- Region: {variant.get('region', 'Global')} (prioritize vendors, regulations, adoption data and examples relevant to this region)""")
+
+    sections.append("""Please work through the remaining workflow:
+1. ContentWriter: Create engaging, forward-looking content from the report
+2. SEOOptimizer: Optimize with current year keywords (2025, 2026)
+3. FactChecker: Verify accuracy and TIMELINESS (must be current/future, not past)""")
+    return "\n\n".join(sections)
+
+
+def build_revision_task(topic: str, draft: str, issues: dict) -> str:
+    """Task for a targeted ContentWriter rewrite of only the passages FactChecker flagged."""
+    def bullet_list(items):
+        return "\n".join(f"- {item}" for item in items) or "- (none)"
+
+    return f"""📅 **TODAY'S DATE: {datetime.now().strftime('%B %d, %Y')}**
+
+TOPIC: {topic if topic else DEFAULT_TOPIC}
+
+The FactChecker flagged problems in the article below. Revise ONLY the passages
+concerned and keep everything else as is, including the title, headings, meta
+description and keywords.
+
+⚠️ CAUTION AREAS (qualify, attribute or remove these claims):
+{bullet_list(issues['caution'])}
+
+❌ OUTDATED INFORMATION (update to current 2025/2026 context or remove):
+{bullet_list(issues['outdated'])}
+
+--- ARTICLE ---
+{draft}
+--- END OF ARTICLE ---
+
+Return the complete revised article."""
+
+
+def build_recheck_task(topic: str, draft: str) -> str:
+    """Task for a FactChecker re-check of a revised article."""
+    return f"""📅 **TODAY'S DATE: {datetime.now().strftime('%B %d, %Y')}**
+
+TOPIC: {topic if topic else DEFAULT_TOPIC}
+
+The article below was revised to address your earlier caution areas and outdated
+information. Verify it again and provide your full credibility report.
+
+--- ARTICLE ---
+{draft}
+--- END OF ARTICLE ---"""
+
+
+async def revise_draft(
+    topic: str,
+    draft: str,
+    fact_check: str,
+    max_iterations: int = REVISION_MAX_ITERATIONS,
+    max_cost_usd: float | None = None,
+    min_score: float = REVISION_MIN_SCORE,
+    cancellation_token=None,
+    model_client=None,
+    backend: str | None = None,
+):
+    """
+    Revision loop: while the FactChecker's overall score is below min_score and it
+    flagged caution areas or outdated information, ContentWriter rewrites only those
+    passages and FactChecker re-checks the result - two model calls per iteration
+    instead of a full four-agent re-run. Yields those messages with a 'revision' number.
+
+    Stops after max_iterations, or before an iteration once the revisions' estimated
+    cost has reached max_cost_usd.
+    """
+    model_client = model_client or get_model_client(backend)
+    model = get_model_name(backend)
+    spent = 0.0
+    for revision in range(1, max_iterations + 1):
+        if calculate_overall_score(extract_scores_from_response(fact_check)) >= min_score:
+            return
+        issues = extract_flagged_issues(fact_check)
+        if not issues['caution'] and not issues['outdated']:
+            return
+        if max_cost_usd is not None and spent >= max_cost_usd:
+            return
+
+        writer = create_content_writer_agent(model_client)
+        async for message in stream_messages(writer, build_revision_task(topic, draft, issues), cancellation_token):
+            spent += estimate_cost(message['prompt_tokens'], message['completion_tokens'], model)
+            draft = message['content']
+            yield {**message, 'revision': revision}
+        if cancellation_token is not None and cancellation_token.is_cancelled():
+            return
+
+        checker = create_fact_checker_agent(model_client)
+        async for message in stream_messages(checker, build_recheck_task(topic, draft), cancellation_token):
+            spent += estimate_cost(message['prompt_tokens'], message['completion_tokens'], model)
+            fact_check = message['content']
+            yield {**message, 'revision': revision}
+        if cancellation_token is not None and cancellation_token.is_cancelled():
+            return
+
+
+async def _with_revisions(messages, topic, max_iterations, max_cost_usd, cancellation_token, model_client=None, backend=None):
+    """Pass a run's messages through, then revise its final draft if it scored low."""
+    outputs = {}
+    async for message in messages:
+        outputs[message['agent']] = message['content']
+        yield message
+    if cancellation_token is not None and cancellation_token.is_cancelled():
+        return
+    draft = outputs.get('SEOOptimizer') or outputs.get('ContentWriter')
+    if draft and 'FactChecker' in outputs:
+        async for message in revise_draft(
+            topic, draft, outputs['FactChecker'], max_iterations, max_cost_usd,
+            cancellation_token=cancellation_token, model_client=model_client, backend=backend,
+        ):
+            yield message
+
+
+async def run_fanout(
+    topic: str,
+    variants: list,
+    cancellation_token=None,
+    research_backend: str | None = None,
+    backend: str | None = None,
+    **team_options,
+) -> dict:
+    """
+    Fan-out mode: run TrendCollector once, then ContentWriter, SEOOptimizer and FactChecker
+    concurrently for each variant ({'name', 'language', 'region'}) on the shared research.
+    research_backend and backend choose the model backend for the research and the
+    downstream chains, e.g. the hosted API for research and a local model for drafts.
+
+    Returns {'topic', 'research', 'variants': {name: {'messages', 'usage', 'error'}}, 'cost_report'}.
+    """
+    research_id = new_run_id()
+    research_agent = create_trend_collector_agent(get_model_client(research_backend))
+    research_stream = stream_messages(research_agent, build_task(topic), cancellation_token)
+    research = [m async for m in log_run(
+        research_stream, research_id, topic, cancellation_token, get_model_name(research_backend), mode='fanout'
+    )]
+    if not research:
+        raise RuntimeError("TrendCollector produced no report")
+    report = research[-1]['content']
+
+    model_client = get_model_client(backend)
+
+    async def run_variant(variant: dict) -> list:
+        team = await create_downstream_team(backend=backend, model_client=model_client, **team_options)
+        task = build_downstream_task(topic, report, variant=variant)
+        stream = stream_messages(team, task, cancellation_token)
+        return [m async for m in log_run(
+            stream, new_run_id(), topic, cancellation_token, get_model_name(backend),
+            research_run_id=research_id, variant=variant['name'],
+        )]
+
+    outcomes = await asyncio.gather(*(run_variant(v) for v in variants), return_exceptions=True)
+
+    results = {}
+    for variant, outcome in zip(variants, outcomes):
+        failed = isinstance(outcome, BaseException)
+        messages = [] if failed else outcome
+        results[variant['name']] = {
+            'variant': variant,
+            'messages': messages,
+            'usage': summarize_usage(messages, get_model_name(backend)),
+            'error': str(outcome) if failed else None,
+        }
+
+    research_usage = summarize_usage(research, get_model_name(research_backend))
+    variant_usages = [r['usage'] for r in results.values()]
+    total_usage = {
+        key: sum(usage[key] for usage in [research_usage] + variant_usages)
+        for key in ('prompt_tokens', 'completion_tokens', 'cost_usd')
+    }
+    return {
+        'topic': topic,
+        'research': research[-1],
+        'variants': results,
+        'cost_report': {
+            'research': research_usage,
+            'variants': {name: r['usage'] for name, r in results.items()},
+            'total': total_usage,
+        },
+    }
+
+
+def get_cached_result(topic: str, record: bool = True, **config) -> dict | None:
+    """
+    Return {'topic', 'created_at', 'run_id'} for a fresh cached run of the topic/config, or None.
+    With record=True the lookup counts towards the topic's hit/miss statistics.
+    """
+    cached = result_cache.get(run_key(topic, **config))
+    if record:
+        result_cache.record_request(normalize_topic(topic), hit=cached is not None)
+    return cached
+
+
+async def stream_and_cache(topic: str, cancellation_token=None, run_id=None, **team_options):
+    """
+    Stream a run, writing each message to the run store as it arrives, and register
+    the run in the result cache once every agent has finished.
+    """
+    run_id = run_store.create_run(normalize_topic(topic), run_id)
+    agents_seen = set()
+    status = 'failed'
+    try:
+        async for message in stream_agent_messages(
+            topic, cancellation_token=cancellation_token, run_id=run_id, **team_options
+        ):
+            run_store.append_message(run_id, message)
+            agents_seen.add(message['agent'])
+            yield message
+        cancelled = cancellation_token is not None and cancellation_token.is_cancelled()
+        status = 'cancelled' if cancelled else 'complete'
+    finally:
+        run_store.finish_run(run_id, status)
+
+    if status == 'complete' and agents_seen.issuperset(AGENT_NAMES):
+        result_cache.put(run_key(topic, **team_options), normalize_topic(topic), run_id)
+
+
+# Process-wide single-flight layer: identical in-flight requests share one run
+shared_runs = SingleFlight(stream_and_cache, make_key=run_key)
@@ -0,0 +1,110 @@
+"""
+ERP Trend Agent - Pre-warm Scheduler
+Pre-computes analyses for popular topics off-peak so morning requests are served
+from the result cache instantly.
+
+Usage:
+    python prewarm.py --topics topics.txt            # one-shot, e.g. from cron
+    python prewarm.py --top 12 --at 03:00            # daily at 03:00, most requested topics
+    python prewarm.py --stats                        # per-topic hit/miss statistics
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from pipeline import get_cached_result, normalize_topic, result_cache, shared_runs
+
+
+def load_topics(path: str) -> list:
+    """Read one topic per line, skipping blanks and '#' comments."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+async def prewarm_topic(topic: str, semaphore: asyncio.Semaphore) -> str:
+    """
+    Run one topic unless a fresh result is already cached. Returns the outcome: 'fresh',
+    'computed', 'incomplete' (the run ended without a cacheable result) or 'failed'.
+    """
+    if get_cached_result(topic, record=False) is not None:
+        return 'fresh'
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            count = 0
+            async for _ in shared_runs.stream(topic):
+                count += 1
+        except Exception as e:
+            print(f"  ✗ {topic}: {e}")
+            return 'failed'
+    # Only a run that every agent finished is cached; one stopped early (timeout, cost
+    # ceiling, cancellation) leaves the topic cold
+    if get_cached_result(topic, record=False) is None:
+        print(f"  ✗ {topic}: stopped early after {count} messages, nothing cached")
+        return 'incomplete'
+    result_cache.record_prewarm(normalize_topic(topic))
+    print(f"  ✓ {topic}: {count} messages in {time.monotonic() - started:.0f}s")
+    return 'computed'
+
+
+async def prewarm(topics: list, concurrency: int) -> dict:
+    """Pre-compute every topic with at most `concurrency` runs at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    topics = list({normalize_topic(topic): topic for topic in topics}.values())
+    outcomes = await asyncio.gather(*(prewarm_topic(topic, semaphore) for topic in topics))
+    return {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+
+
+def seconds_until(at: str) -> float:
+    """Seconds from now until the next HH:MM local time."""
+    hour, minute = (int(part) for part in at.split(':'))
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+def print_stats():
+    print(f"{'Topic':<50} {'Req':>5} {'Hits':>5} {'Miss':>5} {'Hit%':>6} {'Warm':>5}")
+    for row in result_cache.topic_stats():
+        print(f"{row['topic'][:50]:<50} {row['requests']:>5} {row['hits']:>5} {row['misses']:>5} "
+              f"{row['hit_rate'] * 100:>5.0f}% {row['prewarmed']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the ERP trend result cache.")
+    parser.add_argument("--topics", help="File with one topic per line")
+    parser.add_argument("--top", type=int, default=12, help="Use the N most requested topics when --topics is not given")
+    parser.add_argument("--concurrency", type=int, default=2, help="Maximum concurrent runs (default: 2)")
+    parser.add_argument("--at", help="Run daily at this local time (HH:MM) instead of once")
+    parser.add_argument("--stats", action="store_true", help="Print per-topic hit/miss statistics and exit")
+    args = parser.parse_args()
+
+    if args.stats:
+        print_stats()
+        return
+
+    while True:
+        if args.at:
+            delay = seconds_until(args.at)
+            print(f"Next pre-warm at {args.at} (in {delay / 3600:.1f}h)")
+            time.sleep(delay)
+
+        topics = load_topics(args.topics) if args.topics else result_cache.top_topics(args.top)
+        if not topics:
+            print("No topics to pre-warm.")
+        else:
+            print(f"Pre-warming {len(topics)} topics (concurrency {args.concurrency})...")
+            summary = asyncio.run(prewarm(topics, args.concurrency))
+            print("Done:", ", ".join(f"{k}={v}" for k, v in sorted(summary.items())))
+
+        if not args.at:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Result cache for completed pipeline runs.
+Finished runs are indexed in SQLite by normalized topic and configuration and are
+served while they are younger than the freshness window; the content itself lives once
+in the run store, so the cache only records run IDs. Per-topic request, hit and
+miss counts are kept alongside so the pre-warm scheduler can pick and tune its topics.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join(".cache", "results.db"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(12 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cached_runs (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    run_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS topic_stats (
+    topic TEXT PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    prewarmed INTEGER NOT NULL DEFAULT 0,
+    last_requested REAL
+);
+"""
+
+
+class ResultCache:
+    """SQLite-backed cache of finished runs, safe to share across threads and processes."""
+
+    def __init__(self, path: str = RESULT_CACHE_PATH, ttl_seconds: int = RESULT_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets the dashboard read while a pre-warm job writes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> dict | None:
+        """Return {'topic', 'created_at', 'run_id'} for a fresh entry, or None."""
+        row = self._connect().execute(
+            "SELECT topic, created_at, run_id FROM cached_runs WHERE key = ? AND created_at >= ?",
+            (key, time.time() - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        return {'topic': row[0], 'created_at': row[1], 'run_id': row[2]}
+
+    def put(self, key: str, topic: str, run_id: str):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cached_runs (key, topic, created_at, run_id) VALUES (?, ?, ?, ?)",
+            (key, topic, time.time(), run_id),
+        )
+
+    def record_request(self, topic: str, hit: bool):
+        """Count a user-facing lookup for a topic as a cache hit or miss."""
+        self._connect().execute(
+            """INSERT INTO topic_stats (topic, requests, hits, misses, last_requested)
+               VALUES (?, 1, ?, ?, ?)
+               ON CONFLICT(topic) DO UPDATE SET
+                   requests = requests + 1,
+                   hits = hits + excluded.hits,
+                   misses = misses + excluded.misses,
+                   last_requested = excluded.last_requested""",
+            (topic, int(hit), int(not hit), time.time()),
+        )
+
+    def record_prewarm(self, topic: str):
+        self._connect().execute(
+            """INSERT INTO topic_stats (topic, prewarmed) VALUES (?, 1)
+               ON CONFLICT(topic) DO UPDATE SET prewarmed = prewarmed + 1""",
+            (topic,),
+        )
+
+    def top_topics(self, limit: int) -> list:
+        """Return the most frequently requested topics, most popular first."""
+        rows = self._connect().execute(
+            "SELECT topic FROM topic_stats WHERE requests > 0 ORDER BY requests DESC, last_requested DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def topic_stats(self) -> list:
+        """Return per-topic request/hit/miss/prewarm counts, most requested first."""
+        rows = self._connect().execute(
+            "SELECT topic, requests, hits, misses, prewarmed FROM topic_stats ORDER BY requests DESC"
+        ).fetchall()
+        return [
+            {'topic': t, 'requests': r, 'hits': h, 'misses': m, 'prewarmed': p,
+             'hit_rate': round(h / r, 3) if r else 0.0}
+            for t, r, h, m, p in rows
+        ]
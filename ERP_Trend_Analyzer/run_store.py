@@ -0,0 +1,144 @@
+"""
+Shared, disk-backed store of pipeline runs.
+Every agent message is written once, keyed by run ID, as it arrives. Dashboard sessions,
+the result cache and the server keep only run IDs and load content on demand.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", os.path.join(".cache", "runs.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+# Columns added to the messages table after its first release, for stores created before them
+MESSAGE_COLUMNS = {
+    'prompt_tokens': "INTEGER NOT NULL DEFAULT 0",
+    'completion_tokens': "INTEGER NOT NULL DEFAULT 0",
+    'revision': "INTEGER",
+}
+
+MESSAGE_FIELDS = ('agent', 'content', 'timestamp', 'prompt_tokens', 'completion_tokens', 'revision')
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _message(row) -> dict:
+    message = dict(zip(MESSAGE_FIELDS, row))
+    # Only revision-loop messages carry a revision number
+    if message['revision'] is None:
+        del message['revision']
+    return message
+
+
+class RunStore:
+    """SQLite-backed run store, safe to share across threads and processes."""
+
+    def __init__(self, path: str = RUN_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+        for column, definition in MESSAGE_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE messages ADD COLUMN {column} {definition}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create_run(self, topic: str, run_id: str | None = None) -> str:
+        run_id = run_id or new_run_id()
+        self._connect().execute(
+            "INSERT INTO runs (run_id, topic, created_at, status) VALUES (?, ?, ?, 'running')",
+            (run_id, topic, time.time()),
+        )
+        return run_id
+
+    def append_message(self, run_id: str, message: dict):
+        """
+        Append one pipeline message to a run: agent, content, timestamp, its token counts
+        and, for revision-loop messages, the revision number.
+        """
+        self._connect().execute(
+            """INSERT INTO messages (run_id, seq, agent, timestamp, content, prompt_tokens, completion_tokens, revision)
+               SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ?, ?, ?, ?, ? FROM messages WHERE run_id = ?""",
+            (run_id, message['agent'], message['timestamp'], message['content'], message.get('prompt_tokens', 0),
+             message.get('completion_tokens', 0), message.get('revision'), run_id),
+        )
+
+    def finish_run(self, run_id: str, status: str):
+        """Mark a run 'complete', 'cancelled' or 'failed'."""
+        self._connect().execute("UPDATE runs SET status = ? WHERE run_id = ?", (status, run_id))
+
+    def get_run(self, run_id: str) -> dict | None:
+        row = self._connect().execute(
+            "SELECT run_id, topic, created_at, status FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('run_id', 'topic', 'created_at', 'status'), row))
+
+    def count_messages(self, run_id: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM messages WHERE run_id = ?", (run_id,)).fetchone()[0]
+
+    def list_messages(self, run_id: str) -> list:
+        """Lightweight message index for a run: seq, agent, timestamp and length, no content."""
+        rows = self._connect().execute(
+            "SELECT seq, agent, timestamp, LENGTH(content) FROM messages WHERE run_id = ? ORDER BY seq",
+            (run_id,),
+        ).fetchall()
+        return [dict(zip(('seq', 'agent', 'timestamp', 'length'), row)) for row in rows]
+
+    def get_message(self, run_id: str, seq: int) -> dict | None:
+        row = self._connect().execute(
+            f"SELECT {', '.join(MESSAGE_FIELDS)} FROM messages WHERE run_id = ? AND seq = ?", (run_id, seq)
+        ).fetchone()
+        if row is None:
+            return None
+        return _message(row)
+
+    def get_messages(self, run_id: str) -> list:
+        """A run's messages in the shape the pipeline streamed them."""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(MESSAGE_FIELDS)} FROM messages WHERE run_id = ? ORDER BY seq", (run_id,)
+        ).fetchall()
+        return [_message(row) for row in rows]
+
+    def get_agent_outputs(self, run_id: str) -> dict:
+        """Latest output of each agent in the run, in order of first appearance."""
+        outputs = {}
+        for message in self.get_messages(run_id):
+            outputs[message['agent']] = message['content']
+        return outputs
@@ -0,0 +1,83 @@
+"""
+Credibility scoring of FactChecker output.
+Shared by the dashboard and the evaluation harness so both score runs the same way.
+"""
+
+import re
+
+SCORE_WEIGHTS = {
+    'Factual Accuracy': 0.40,
+    'Source Credibility': 0.25,
+    'Content Quality': 0.20,
+    'Timeliness': 0.15
+}
+
+
+def extract_scores_from_response(response: str) -> dict:
+    """Extract credibility scores from the fact checker's response."""
+    scores = {
+        'Factual Accuracy': 85,
+        'Source Credibility': 80,
+        'Content Quality': 88,
+        'Timeliness': 90
+    }
+    
+    patterns = [
+        (r'Factual Accuracy[:\s|]*(\d+)%?', 'Factual Accuracy'),
+        (r'Source Credibility[:\s|]*(\d+)%?', 'Source Credibility'),
+        (r'Content Quality[:\s|]*(\d+)%?', 'Content Quality'),
+        (r'Timeliness[:\s|]*(\d+)%?', 'Timeliness'),
+    ]
+    
+    for pattern, key in patterns:
+        match = re.search(pattern, response, re.IGNORECASE)
+        if match:
+            try:
+                scores[key] = int(match.group(1))
+            except ValueError:
+                pass
+    
+    return scores
+
+
+def calculate_overall_score(scores: dict) -> float:
+    """Calculate weighted overall credibility score."""
+    total = sum(scores.get(k, 0) * w for k, w in SCORE_WEIGHTS.items())
+    return round(total, 1)
+
+
+# FactChecker report sections that a revision pass sends back to ContentWriter
+FLAGGED_SECTIONS = {
+    'caution': r'Caution Areas',
+    'outdated': r'Outdated Information',
+}
+
+NO_ISSUES = re.compile(r'^(none|n/a|nothing|no (outdated|caution|issues))\b', re.IGNORECASE)
+
+
+def extract_flagged_issues(response: str) -> dict:
+    """
+    Extract the items listed under the FactChecker's "Caution Areas" and "Outdated
+    Information" sections. Returns {'caution': [...], 'outdated': [...]}.
+    """
+    issues = {key: [] for key in FLAGGED_SECTIONS}
+    lines = response.splitlines()
+    for key, heading in FLAGGED_SECTIONS.items():
+        for i, line in enumerate(lines):
+            if not re.search(heading, line, re.IGNORECASE):
+                continue
+            # Items may follow the heading on the same line ("Caution Areas: a; b")
+            inline = re.search(heading + r'[^:]*:\**(.*)$', line, re.IGNORECASE)
+            items = [inline.group(1).strip(' *')] if inline else []
+            for item in lines[i + 1:]:
+                stripped = item.strip()
+                if not stripped:
+                    if items:
+                        break
+                    continue
+                if not re.match(r'^([-*•]|\d+[.)])\s*', stripped):
+                    break
+                items.append(re.sub(r'^([-*•]|\d+[.)])\s*', '', stripped))
+            issues[key] = [item for item in items if item and not NO_ISSUES.match(item)]
+            break
+    return issues
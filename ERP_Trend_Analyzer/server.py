@@ -0,0 +1,119 @@
+"""
+ERP Trend Agent - HTTP Server
+Exposes the multi-agent pipeline over HTTP with Server-Sent-Events streaming,
+so other internal systems can consume trend reports without the Streamlit UI.
+
+Run with:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /analyze   {"topic": "...", "max_revisions": 0} -> text/event-stream of per-agent messages
+    GET  /health    liveness check
+    GET  /metrics   request, coalescing and run counters
+"""
+
+import json
+import os
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from model_backends import MODEL_BACKEND
+from pipeline import get_cached_result, run_store, shared_runs
+
+load_dotenv()
+
+
+# Upper bound for the per-request revision iterations
+MAX_REVISIONS = 3
+
+tenant_requests = Counter()
+server_stats = Counter()
+started_at = time.time()
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent-Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def analyze(request: Request):
+    """Start (or join) a run for the posted topic and stream its messages as SSE."""
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if MODEL_BACKEND == "openai" and (not api_key or api_key == "your-openai-api-key-here"):
+        return JSONResponse({'error': 'OPENAI_API_KEY is not configured'}, status_code=503)
+
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return JSONResponse({'error': 'Request body must be JSON'}, status_code=400)
+    if not isinstance(body, dict):
+        body = {}
+    topic = (body.get('topic') or '').strip()
+    max_revisions = body.get('max_revisions', 0)
+    # bool is an int subclass, so JSON true/false would otherwise pass as 1/0
+    valid = isinstance(max_revisions, int) and not isinstance(max_revisions, bool)
+    if not valid or not 0 <= max_revisions <= MAX_REVISIONS:
+        return JSONResponse({'error': f'max_revisions must be an integer from 0 to {MAX_REVISIONS}'}, status_code=400)
+    # Revision mode is a separate cache/coalescing key, so only pass it when enabled
+    config = {'max_revisions': max_revisions} if max_revisions else {}
+
+    tenant_requests[request.headers.get('x-tenant-id', 'default')] += 1
+    cached = get_cached_result(topic, **config)
+    if cached is not None:
+        server_stats['cache_hits'] += 1
+
+        async def cached_stream():
+            messages = run_store.get_messages(cached['run_id'])
+            for message in messages:
+                yield format_sse('message', message)
+            yield format_sse('done', {'messages': len(messages), 'cached': True, 'run_id': cached['run_id']})
+
+        return StreamingResponse(cached_stream(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
+    flight, subscriber = shared_runs.join(topic, **config)
+
+    async def event_stream():
+        count = 0
+        try:
+            async for message in flight.subscribe():
+                count += 1
+                yield format_sse('message', message)
+        except Exception as e:
+            yield format_sse('error', {'error': str(e)})
+        finally:
+            # A disconnected client stops following; the run finishes and is cached for others
+            flight.detach(subscriber)
+        yield format_sse('done', {'messages': count, 'run_id': flight.run_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def health(request: Request):
+    return JSONResponse({'status': 'ok'})
+
+
+async def metrics(request: Request):
+    return JSONResponse({
+        'uptime_seconds': round(time.time() - started_at, 1),
+        'runs_in_flight': len(shared_runs),
+        **shared_runs.stats,
+        **server_stats,
+        'requests_by_tenant': dict(tenant_requests),
+    })
+
+
+app = Starlette(routes=[
+    Route('/analyze', analyze, methods=['POST']),
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+])
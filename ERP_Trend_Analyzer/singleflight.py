@@ -0,0 +1,210 @@
+"""
+Single-flight execution of pipeline runs.
+Identical requests (same normalized topic and configuration) that arrive while a run
+is in flight join that run's message stream instead of starting their own. Late joiners
+get a replay of the messages already emitted, then follow the live stream.
+
+Runs execute on a shared background event loop, so subscribers can live on any thread
+and any event loop (Streamlit script threads, the HTTP server, batch jobs). Each join()
+registers a subscriber; cancelling detaches only that subscriber, and the run itself
+stops once nobody is left following it.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import Counter
+
+from autogen_core import CancellationToken
+
+from run_store import new_run_id
+
+
+class Flight:
+    """One in-flight run: a replayable, append-only message log with async subscribers."""
+
+    def __init__(self, key: str, loop: asyncio.AbstractEventLoop):
+        self.key = key
+        self.run_id = new_run_id()
+        self.messages = []
+        self.done = False
+        self.error = None
+        self.cancelled = False
+        self.cancellation_token = CancellationToken()
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._waiters = set()
+        self._subscribers = set()
+        self._subscriber_ids = itertools.count(1)
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def attach(self) -> int | None:
+        """Register a subscriber and return its ID, or None if the run was already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                return None
+            subscriber = next(self._subscriber_ids)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def detach(self, subscriber: int | None):
+        """Stop counting a subscriber; the run keeps going for everyone else."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def cancel(self, subscriber: int | None = None):
+        """
+        Detach `subscriber` and stop the run, including the in-flight model call, once no
+        subscribers remain. Without a subscriber the run stops for everyone. Messages
+        emitted so far are kept and remaining subscribers finish normally.
+        """
+        with self._lock:
+            if subscriber is not None:
+                self._subscribers.discard(subscriber)
+                if self._subscribers:
+                    return
+            if self.done or self.cancelled:
+                return
+            self.cancelled = True
+        self._loop.call_soon_threadsafe(self.cancellation_token.cancel)
+
+    def publish(self, message: dict):
+        with self._lock:
+            self.messages.append(message)
+            waiters = list(self._waiters)
+        self._wake(waiters)
+
+    def finish(self, error: BaseException | None = None):
+        with self._lock:
+            self.done = True
+            self.error = error
+            waiters = list(self._waiters)
+        self._wake(waiters)
+
+    def _wake(self, waiters):
+        for waiter in waiters:
+            loop, event = waiter
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Subscriber's event loop was closed without unsubscribing
+                with self._lock:
+                    self._waiters.discard(waiter)
+
+    async def subscribe(self):
+        """Yield every message of the run from the beginning; re-raise the run's error if it failed."""
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            self._waiters.add(waiter)
+        index = 0
+        try:
+            while True:
+                with self._lock:
+                    batch = self.messages[index:]
+                    done, error = self.done, self.error
+                    wakeup.clear()
+                for message in batch:
+                    yield message
+                index += len(batch)
+                if done and not batch:
+                    if error is not None:
+                        raise error
+                    return
+                if not batch:
+                    await wakeup.wait()
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent runs of an async-generator runner.
+    runner(topic, cancellation_token=..., run_id=..., **config) must yield message dicts;
+    make_key(topic, **config) decides which requests are identical.
+    """
+
+    def __init__(self, runner, make_key=None):
+        self._runner = runner
+        self._make_key = make_key or (lambda topic, **config: json.dumps([topic, config], sort_keys=True, default=str))
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self.stats = Counter()
+
+    def __len__(self):
+        return len(self._flights)
+
+    def make_key(self, topic: str, **config) -> str:
+        return self._make_key(topic, **config)
+
+    def get(self, key: str) -> Flight | None:
+        """Return the in-flight run for a key from make_key(), or None if it has finished."""
+        with self._lock:
+            return self._flights.get(key)
+
+    def join(self, topic: str, **config) -> tuple:
+        """
+        Join the in-flight run for this topic/config, starting one if none exists.
+        Returns (flight, subscriber); pass subscriber to flight.cancel() or flight.detach().
+        """
+        key = self.make_key(topic, **config)
+        loop = self._get_loop()
+        with self._lock:
+            flight = self._flights.get(key)
+            subscriber = flight.attach() if flight is not None else None
+            if subscriber is not None:
+                self.stats['runs_joined'] += 1
+                return flight, subscriber
+            flight = Flight(key, loop)
+            subscriber = flight.attach()
+            self._flights[key] = flight
+            self.stats['runs_started'] += 1
+        asyncio.run_coroutine_threadsafe(self._run(flight, topic, config), loop)
+        return flight, subscriber
+
+    async def stream(self, topic: str, **config):
+        """Join (or start) the run for this topic/config and yield its messages."""
+        flight, subscriber = self.join(topic, **config)
+        try:
+            async for message in flight.subscribe():
+                yield message
+        finally:
+            flight.detach(subscriber)
+
+    async def _run(self, flight: Flight, topic: str, config: dict):
+        error = None
+        try:
+            async for message in self._runner(
+                topic, cancellation_token=flight.cancellation_token, run_id=flight.run_id, **config
+            ):
+                flight.publish(message)
+        except asyncio.CancelledError as e:
+            if not flight.cancelled:
+                error = e
+                self.stats['runs_failed'] += 1
+        except BaseException as e:
+            error = e
+            self.stats['runs_failed'] += 1
+        finally:
+            if flight.cancelled:
+                self.stats['runs_cancelled'] += 1
+            with self._lock:
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+            flight.finish(error)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="singleflight-loop", daemon=True
+                ).start()
+            return self._loop
@@ -0,0 +1,81 @@
+"""
+Shared runs seen from two dashboard sessions: one session cancelling its view of a run
+must not change what another session following the same run ends up with.
+Runs a fake four-agent pipeline, so no model backend is needed.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRATCH = tempfile.mkdtemp()
+os.environ.update({
+    'OPENAI_API_KEY': 'test-key',
+    'RUN_STORE_PATH': os.path.join(SCRATCH, 'runs.db'),
+    'RESULT_CACHE_PATH': os.path.join(SCRATCH, 'results.db'),
+    'TREND_HISTORY_PATH': os.path.join(SCRATCH, 'trends.db'),
+    'EVENT_LOG_ENABLED': 'false',
+})
+sys.path.insert(0, APP_DIR)
+
+import pipeline  # noqa: E402
+from agents import AGENT_NAMES  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+MESSAGE_DELAY = 0.3
+
+
+async def fake_stream_agent_messages(topic, cancellation_token=None, **team_options):
+    for agent in AGENT_NAMES:
+        delay = asyncio.ensure_future(asyncio.sleep(MESSAGE_DELAY))
+        if cancellation_token is not None:
+            cancellation_token.link_future(delay)
+        await delay
+        yield {'agent': agent, 'content': f"{agent} report on {topic}", 'timestamp': '12:00:00',
+               'prompt_tokens': 0, 'completion_tokens': 0}
+
+
+def follow(app: AppTest, flight, subscriber, cancel_requested: bool = False):
+    """Put a session in the middle of following `flight`, as after clicking Analyze."""
+    app.session_state['flight'] = flight
+    app.session_state['subscriber'] = subscriber
+    app.session_state['cancel_requested'] = cancel_requested
+    app.session_state['is_running'] = True
+    app.session_state['current_agent'] = 0
+    return app.run()
+
+
+def shown(app: AppTest) -> str:
+    return "\n".join(element.value for element in app.markdown)
+
+
+def test_second_subscriber_gets_full_report_after_another_cancels(monkeypatch):
+    monkeypatch.setattr(pipeline, 'stream_agent_messages', fake_stream_agent_messages)
+    cancelling = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=30).run()
+    following = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=30).run()
+
+    flight, other = pipeline.shared_runs.join("shared cancel topic")
+    same_flight, mine = pipeline.shared_runs.join("shared cancel topic")
+    assert same_flight is flight
+    time.sleep(MESSAGE_DELAY * 2.5)
+
+    # The cancelling session renders (and caches) every view of the partial run
+    flight.cancel(mine)
+    follow(cancelling, flight, mine, cancel_requested=True)
+    assert not flight.cancelled
+    assert cancelling.session_state['run_id'] == flight.run_id
+    assert 0 < len(cancelling.session_state['completed_agents']) < len(AGENT_NAMES)
+    cancelled_report = cancelling.radio(key='results_view').set_value("📄 Full Report").run()
+    assert f"{AGENT_NAMES[-1]} report" not in shown(cancelled_report)
+
+    # The other session follows the same run to the end and sees all of it
+    follow(following, flight, other)
+    assert flight.done and not flight.cancelled
+    assert following.session_state['completed_agents'] == list(range(len(AGENT_NAMES)))
+    outputs = following.markdown
+    assert all(any(f"{agent} report" in element.value for element in outputs) for agent in AGENT_NAMES)
+    report = following.radio(key='results_view').set_value("📄 Full Report").run()
+    assert all(f"{agent} report" in shown(report) for agent in AGENT_NAMES)
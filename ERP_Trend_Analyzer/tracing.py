@@ -0,0 +1,109 @@
+"""
+Optional OpenTelemetry-style tracing.
+Spans cover dashboard script runs, pipeline runs, agent turns and model requests, with
+token and queueing attributes, so a slow run can be split into Streamlit, orchestration,
+queueing and model time. TRACING=console prints finished spans to stderr, TRACING=file
+appends them as JSON lines to TRACE_PATH; with tracing off (the default) span() returns
+a shared no-op object.
+"""
+
+import contextvars
+import os
+import secrets
+import sys
+import time
+
+from event_log import EventLog
+
+TRACING = os.getenv("TRACING", "off").lower()
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(".cache", "traces.jsonl"))
+TRACING_ENABLED = TRACING in ("console", "file")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_file_exporter = EventLog(TRACE_PATH, enabled=TRACING == "file")
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off; every operation does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed operation with attributes; nested spans share the trace of their parent."""
+
+    def __init__(self, name: str, attributes: dict):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.status = 'ok'
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from another context, e.g. an async generator finalized elsewhere
+            pass
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.status = 'error'
+            self.attributes['error'] = f"{exc_type.__name__}: {exc}"
+        elif exc_type is not None:
+            # Control flow such as task cancellation or a Streamlit rerun, not a failure
+            self.attributes['exit'] = exc_type.__name__
+        export({
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': round(self.start, 6),
+            'duration_ms': round(duration_ms, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        })
+        return False
+
+
+def span(name: str, **attributes):
+    """Context manager for a span; a no-op when tracing is off."""
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    return Span(name, attributes)
+
+
+def export(record: dict):
+    if TRACING == "file":
+        _file_exporter.log(record)
+    else:
+        attributes = " ".join(f"{k}={v}" for k, v in record['attributes'].items())
+        print(f"[trace {record['trace_id'][:8]}] {record['name']} {record['duration_ms']:.1f}ms "
+              f"{record['status']} {attributes}", file=sys.stderr)
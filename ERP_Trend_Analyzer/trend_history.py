@@ -0,0 +1,149 @@
+"""
+Trend history and diffing between successive runs of the same topic.
+Structured TrendCollector findings are stored per topic; each new run is compared with
+the previous one to find new, dropped and changed trends, which focuses ContentWriter
+on what is new and gives analysts a change summary.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+
+TREND_HISTORY_PATH = os.getenv("TREND_HISTORY_PATH", os.path.join(".cache", "trends.db"))
+
+# Titles at least this similar are treated as the same trend
+TITLE_MATCH_RATIO = 0.75
+# Summaries less similar than this mark a matched trend as changed
+SUMMARY_CHANGE_RATIO = 0.6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    run_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    trends TEXT NOT NULL,
+    diff TEXT
+);
+CREATE INDEX IF NOT EXISTS findings_topic ON findings (topic, created_at);
+"""
+
+JSON_BLOCK = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+HEADING = re.compile(r"^\s*(?:#{2,4}\s*|\d+\.\s*\*\*|\*\*\d+\.\s*)(.+?)\**\s*$", re.MULTILINE)
+
+
+def extract_findings(report: str) -> list:
+    """
+    Pull structured trends out of a TrendCollector report: the ```json block it is asked
+    to emit, or, failing that, its section headings. Returns [{'title', 'summary', ...}].
+    """
+    match = JSON_BLOCK.search(report or "")
+    if match:
+        try:
+            trends = json.loads(match.group(1)).get('trends', [])
+            return [t for t in trends if isinstance(t, dict) and t.get('title')]
+        except (json.JSONDecodeError, AttributeError):
+            pass
+
+    findings = []
+    headings = list(HEADING.finditer(report or ""))
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(report)
+        body = report[heading.end():end].strip()
+        title = heading.group(1).strip(' *:#')
+        if title and body:
+            findings.append({'title': title, 'summary': ' '.join(body.split())[:500]})
+    return findings
+
+
+def _normalize_title(title: str) -> str:
+    # Years and punctuation change run to run ("2025" -> "2026") without changing the trend
+    title = re.sub(r"\b20\d\d\b", " ", title.lower())
+    return " ".join(re.sub(r"[^a-z0-9 ]+", " ", title).split())
+
+
+def diff_findings(previous: list, current: list) -> dict:
+    """Compare two findings lists; returns {'new', 'dropped', 'changed', 'unchanged'} lists of titles."""
+    unmatched = list(previous)
+    diff = {'new': [], 'dropped': [], 'changed': [], 'unchanged': []}
+    for trend in current:
+        title = _normalize_title(trend['title'])
+        best, best_ratio = None, 0.0
+        for candidate in unmatched:
+            ratio = SequenceMatcher(None, title, _normalize_title(candidate['title'])).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = candidate, ratio
+        if best is None or best_ratio < TITLE_MATCH_RATIO:
+            diff['new'].append(trend['title'])
+            continue
+        unmatched.remove(best)
+        summary_ratio = SequenceMatcher(None, trend.get('summary', ''), best.get('summary', '')).ratio()
+        details_changed = any(trend.get(k) != best.get(k) for k in ('companies', 'timeframe') if k in trend or k in best)
+        if summary_ratio < SUMMARY_CHANGE_RATIO or details_changed:
+            diff['changed'].append(trend['title'])
+        else:
+            diff['unchanged'].append(trend['title'])
+    diff['dropped'] = [t['title'] for t in unmatched]
+    return diff
+
+
+def format_diff_focus(diff: dict) -> str:
+    """Render a diff as the 'what's new' brief handed to ContentWriter."""
+    def bullet_list(titles):
+        return "\n".join(f"- {t}" for t in titles) or "- (none)"
+
+    return f"""🔄 WHAT'S NEW SINCE THE LAST REPORT ON THIS TOPIC:
+
+NEW trends (cover in depth):
+{bullet_list(diff['new'])}
+
+CHANGED trends (explain what changed):
+{bullet_list(diff['changed'])}
+
+DROPPED trends (mention briefly why they fell away):
+{bullet_list(diff['dropped'])}
+
+UNCHANGED trends (one or two sentences each at most):
+{bullet_list(diff['unchanged'])}"""
+
+
+class TrendHistory:
+    """SQLite-backed history of TrendCollector findings and their diffs, per topic."""
+
+    def __init__(self, path: str = TREND_HISTORY_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def latest(self, topic: str) -> list | None:
+        """Findings of the most recent run of a topic, or None if it was never run."""
+        row = self._connect().execute(
+            "SELECT trends FROM findings WHERE topic = ? ORDER BY created_at DESC LIMIT 1", (topic,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record(self, run_id: str, topic: str, trends: list, diff: dict | None):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO findings (run_id, topic, created_at, trends, diff) VALUES (?, ?, ?, ?, ?)",
+            (run_id, topic, time.time(), json.dumps(trends, ensure_ascii=False),
+             json.dumps(diff) if diff is not None else None),
+        )
+
+    def get_diff(self, run_id: str) -> dict | None:
+        """Diff recorded for a run, or None if it was the first run of its topic."""
+        row = self._connect().execute("SELECT diff FROM findings WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
@@ -0,0 +1,50 @@
+"""
+Benchmark for the settlement engine: random zero-sum groups of increasing size.
+
+Usage:
+    python bench_settlement.py
+    python bench_settlement.py --sizes 10000 100000 --runs 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from settlement import settle
+
+
+def random_balances(n: int, seed: int = 42) -> dict:
+    """n people with random balances (in cents) that add up to zero."""
+    rng = random.Random(seed)
+    balances = {f"person{i}": rng.randint(-500_000, 500_000) for i in range(n - 1)}
+    balances[f"person{n - 1}"] = -sum(balances.values())
+    return balances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark debt settlement.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'People':>8} {'Transfers':>10} {'median ms':>10} {'max ms':>8}")
+    for n in args.sizes:
+        balances = random_balances(n)
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            transfers = settle(balances)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Sanity check: applying the transfers settles everyone exactly
+        remaining = dict(balances)
+        for debtor, creditor, cents in transfers:
+            remaining[debtor] += cents
+            remaining[creditor] -= cents
+        assert not any(remaining.values()), "settlement left non-zero balances"
+        print(f"{n:>8} {len(transfers):>10} {statistics.median(timings):>10.1f} {max(timings):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
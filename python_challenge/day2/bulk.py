@@ -0,0 +1,102 @@
+"""
+Vectorized split computation and bulk participant import for splitwise.
+Participants come from a CSV or Excel file (or the manual widgets) as a DataFrame, and
+shares and balances are computed as whole-column integer-cent operations, so splits
+with hundreds or thousands of people are instant.
+"""
+
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from settlement import split_cents, to_cents, to_cents_array
+
+COLUMNS = ["Name", "Contributed", "Phone"]
+
+# Accepted header spellings, matched case-insensitively
+COLUMN_ALIASES = {
+    "name": "Name",
+    "contributed": "Contributed",
+    "contribution": "Contributed",
+    "paid": "Contributed",
+    "amount": "Contributed",
+    "phone": "Phone",
+    "mobile": "Phone",
+    "shares": "Shares",
+    "weight": "Shares",
+    "currency": "Currency",
+}
+
+TEMPLATE_CSV = "Name,Contributed,Currency,Phone,Shares\nAsha,1200,INR,919800000001,1\nRavi,20,USD,919800000002,2\n"
+
+
+def _rows(df: pd.DataFrame, bad) -> str:
+    """'row 3 (Ravi), row 5 (Asha)' for the flagged rows, numbered as in the file (header is row 1)."""
+    return ", ".join(f"row {i + 2} ({name or 'no name'})" for i, name in df.loc[bad, "Name"].items())
+
+
+def load_participants(data: bytes, filename: str) -> pd.DataFrame:
+    """
+    Read participants from CSV or Excel bytes into Name/Contributed/Phone(/Shares) columns.
+    Raises ValueError for an unreadable file, a negative contribution or a share that is
+    not a whole number of 0 or more, naming the offending rows.
+    """
+    if filename.lower().endswith((".xlsx", ".xls")):
+        try:
+            df = pd.read_excel(io.BytesIO(data))  # needs openpyxl for .xlsx
+        except (zipfile.BadZipFile, LookupError) as e:
+            raise ValueError(f"Not a readable Excel file ({e}).") from e
+    else:
+        df = pd.read_csv(io.BytesIO(data))
+    df = df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), c))
+    if "Name" not in df or "Contributed" not in df:
+        raise ValueError("The file needs at least 'Name' and 'Contributed' columns.")
+
+    df["Name"] = df["Name"].fillna("").astype(str).str.strip()
+    df["Contributed"] = pd.to_numeric(df["Contributed"], errors="coerce").fillna(0.0)
+    negative = df["Contributed"] < 0
+    if negative.any():
+        raise ValueError(f"Contributed can't be negative: {_rows(df, negative)}.")
+    df["Phone"] = df["Phone"].fillna("").astype(str).str.replace(r"\.0$|[^\d]", "", regex=True) if "Phone" in df else ""
+    if "Shares" in df:
+        shares = pd.to_numeric(df["Shares"], errors="coerce").fillna(0)
+        bad = (shares < 0) | (shares % 1 != 0)
+        if bad.any():
+            raise ValueError(f"Shares must be whole numbers of 0 or more: {_rows(df, bad)}.")
+        df["Shares"] = shares.astype(np.int64)
+    if "Currency" in df:
+        df["Currency"] = df["Currency"].fillna("").astype(str).str.strip().str.upper()
+    return df[[c for c in COLUMNS + ["Currency", "Shares"] if c in df]].reset_index(drop=True)
+
+
+def convert_contributions(participants: pd.DataFrame, rate_table, base: str) -> pd.DataFrame:
+    """
+    Convert contributions made in other currencies (a 'Currency' column; blank means
+    `base`) into the base currency in one pass. The original amount is kept as 'Paid'.
+    """
+    if "Currency" not in participants:
+        return participants
+    currencies = participants["Currency"].replace("", base)
+    if (currencies == base).all():
+        return participants
+    df = participants.copy()
+    df.insert(df.columns.get_loc("Contributed"), "Paid", df["Contributed"])
+    df["Contributed"] = to_cents_array(rate_table.convert(df["Contributed"], currencies, base)) / 100
+    return df
+
+
+def compute_split(participants: pd.DataFrame, total: float | None = None) -> pd.DataFrame:
+    """
+    Add Share and Balance columns (in currency units, exact to the cent) to a
+    participants frame. With no total, the sum of the contributions is split.
+    """
+    df = participants.copy()
+    contributed = to_cents_array(df["Contributed"])
+    total_cents = int(contributed.sum()) if total is None else to_cents(total)
+    shares = df["Shares"].to_numpy() if "Shares" in df else None
+    share = split_cents(total_cents, len(df), shares)
+    df["Share"] = share / 100
+    df["Balance"] = (contributed - share) / 100
+    return df
@@ -0,0 +1,72 @@
+"""
+Currency conversion for splitwise.
+Rates come from a provider - the local fx_rates.json by default, or any callable that
+returns {'base': ..., 'rates': {currency: units per base}} - and are cached in memory
+until they expire. Whole columns of amounts are converted in one vectorized pass.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+FX_RATES_PATH = os.getenv(
+    "SPLITWISE_FX_RATES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.json")
+)
+FX_CACHE_SECONDS = int(os.getenv("SPLITWISE_FX_CACHE_SECONDS", "3600"))
+
+
+def file_provider(path: str = FX_RATES_PATH):
+    """Provider reading a local JSON rate table."""
+    def load() -> dict:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return load
+
+
+def http_provider(url: str, timeout: float = 10):
+    """Provider fetching a JSON rate table ({'base', 'rates'}) from a URL."""
+    def load() -> dict:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    return load
+
+
+class RateTable:
+    """FX rates from a provider, cached in memory for `ttl_seconds`."""
+
+    def __init__(self, provider=None, ttl_seconds: int = FX_CACHE_SECONDS):
+        self.provider = provider or file_provider()
+        self.ttl_seconds = ttl_seconds
+        self._rates = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def rates(self) -> dict:
+        """{currency: units per base currency}, reloaded from the provider once expired."""
+        with self._lock:
+            if self._rates is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                table = self.provider()
+                self._rates = {code.upper(): float(rate) for code, rate in table['rates'].items()}
+                self._rates[table['base'].upper()] = 1.0
+                self._loaded_at = time.monotonic()
+            return self._rates
+
+    def currencies(self) -> list:
+        return sorted(self.rates())
+
+    def convert(self, amounts, currencies, to: str) -> np.ndarray:
+        """Convert each amount from its currency into `to`, all rows at once."""
+        rates = self.rates()
+        if to not in rates:
+            raise ValueError(f"No exchange rate for {to}.")
+        codes = pd.Series(currencies, dtype="object").astype(str).str.strip().str.upper()
+        per_base = codes.map(rates)
+        missing = sorted(set(codes[per_base.isna()]))
+        if missing:
+            raise ValueError(f"No exchange rate for {', '.join(missing)}.")
+        return np.asarray(amounts, dtype=np.float64) * (rates[to] / per_base.to_numpy(dtype=np.float64))
@@ -0,0 +1,244 @@
+"""
+Persistent expense ledger for splitwise groups (SQLite).
+Each group records many expenses with equal, exact-amount or share-based splits, paid in
+the group's currency or converted into it with an FX rate table. Every
+member's running balance is stored and updated in the same transaction as each expense,
+so reading a group's balances costs O(members) no matter how many expenses it has.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from settlement import split_cents, split_exact, to_cents
+
+LEDGER_PATH = os.getenv("SPLITWISE_LEDGER_PATH", os.path.join(".cache", "splitwise.db"))
+
+SPLIT_TYPES = ("equal", "exact", "shares")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    currency TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL DEFAULT '',
+    balance_cents INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (group_id, name)
+);
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    description TEXT NOT NULL,
+    paid_by TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    split_type TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    currency TEXT,
+    original_cents INTEGER
+);
+CREATE INDEX IF NOT EXISTS expenses_group ON expenses (group_id, id);
+CREATE TABLE IF NOT EXISTS expense_shares (
+    expense_id INTEGER NOT NULL REFERENCES expenses(id),
+    member TEXT NOT NULL,
+    share_cents INTEGER NOT NULL,
+    PRIMARY KEY (expense_id, member)
+);
+"""
+
+# Columns added after the first release; created on open for older databases
+MIGRATIONS = {
+    'expenses': [("currency", "TEXT"), ("original_cents", "INTEGER")],
+}
+
+
+class Ledger:
+    """SQLite-backed ledger; one connection per thread, so it is safe in Streamlit."""
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, kind in columns:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # -------------- GROUPS & MEMBERS --------------
+
+    def create_group(self, name: str, currency: str) -> int:
+        cursor = self._connect().execute(
+            "INSERT INTO groups (name, currency, created_at) VALUES (?, ?, ?)", (name, currency, time.time())
+        )
+        return cursor.lastrowid
+
+    def list_groups(self) -> list:
+        rows = self._connect().execute("SELECT id, name, currency FROM groups ORDER BY name").fetchall()
+        return [{'id': i, 'name': n, 'currency': c} for i, n, c in rows]
+
+    def add_member(self, group_id: int, name: str, phone: str = ""):
+        self._connect().execute(
+            "INSERT OR IGNORE INTO members (group_id, name, phone) VALUES (?, ?, ?)", (group_id, name, phone)
+        )
+
+    def group_currency(self, group_id: int) -> str:
+        row = self._connect().execute("SELECT currency FROM groups WHERE id = ?", (group_id,)).fetchone()
+        if row is None:
+            raise KeyError(group_id)
+        return row[0]
+
+    def balances(self, group_id: int) -> list:
+        """Current balance of every member: [{'name', 'phone', 'balance_cents'}]."""
+        rows = self._connect().execute(
+            "SELECT name, phone, balance_cents FROM members WHERE group_id = ? ORDER BY name", (group_id,)
+        ).fetchall()
+        return [{'name': n, 'phone': p, 'balance_cents': b} for n, p, b in rows]
+
+    # -------------- EXPENSES --------------
+
+    def add_expense(
+        self,
+        group_id: int,
+        description: str,
+        paid_by: str,
+        amount,
+        split_type: str = "equal",
+        members: list | None = None,
+        amounts: list | None = None,
+        shares: list | None = None,
+        currency: str | None = None,
+        rate_table=None,
+    ) -> int:
+        """
+        Record an expense paid by one member and split among `members` (None: all of them):
+        'equal', 'exact' (per-member `amounts`) or 'shares' (per-member integer `shares`).
+        An expense in another `currency` is converted to the group currency with
+        `rate_table`; exact amounts are scaled with it. Balances are updated in the same
+        transaction.
+        """
+        if split_type not in SPLIT_TYPES:
+            raise ValueError(f"Unknown split type '{split_type}'. Choose one of: {', '.join(SPLIT_TYPES)}")
+        amount_cents = to_cents(amount)
+        if amount_cents <= 0:
+            raise ValueError("Amount must be greater than zero.")
+        if members is None:
+            members = [m['name'] for m in self.balances(group_id)]
+            if not members:
+                raise ValueError("Add members before adding expenses.")
+        elif not members:
+            raise ValueError("Pick at least one member to split between.")
+
+        original_cents = None
+        base = self.group_currency(group_id)
+        if currency and currency != base:
+            if rate_table is None:
+                raise ValueError(f"Need exchange rates to add a {currency} expense to a {base} group.")
+            original_cents = amount_cents
+            amount_cents = to_cents(rate_table.convert([amount], [currency], base)[0])
+        else:
+            currency = None
+
+        if split_type == "equal":
+            share_cents = split_cents(amount_cents, len(members)).tolist()
+        elif split_type == "exact":
+            exact_cents = split_exact(original_cents or amount_cents, [to_cents(a) for a in amounts or []])
+            # Converted amounts keep their proportions and still add up to the converted total
+            if original_cents:
+                share_cents = split_cents(amount_cents, len(members), exact_cents).tolist()
+            else:
+                share_cents = exact_cents
+        else:
+            share_cents = split_cents(amount_cents, len(members), list(shares or [])).tolist()
+        if len(share_cents) != len(members):
+            raise ValueError("Give one amount or share per member.")
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {row[0] for row in conn.execute("SELECT name FROM members WHERE group_id = ?", (group_id,))}
+            unknown = [name for name in [paid_by, *members] if name not in known]
+            if unknown:
+                raise ValueError(f"Not in this group: {', '.join(unknown)}")
+            expense_id = conn.execute(
+                """INSERT INTO expenses
+                   (group_id, description, paid_by, amount_cents, split_type, created_at, currency, original_cents)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (group_id, description, paid_by, amount_cents, split_type, time.time(), currency, original_cents),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO expense_shares (expense_id, member, share_cents) VALUES (?, ?, ?)",
+                [(expense_id, name, cents) for name, cents in zip(members, share_cents)],
+            )
+            self._apply(conn, group_id, paid_by, amount_cents, zip(members, share_cents), sign=1)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return expense_id
+
+    def delete_expense(self, expense_id: int):
+        """Remove an expense and reverse its effect on the balances."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT group_id, paid_by, amount_cents FROM expenses WHERE id = ?", (expense_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(expense_id)
+            group_id, paid_by, amount_cents = row
+            shares = conn.execute(
+                "SELECT member, share_cents FROM expense_shares WHERE expense_id = ?", (expense_id,)
+            ).fetchall()
+            self._apply(conn, group_id, paid_by, amount_cents, shares, sign=-1)
+            conn.execute("DELETE FROM expense_shares WHERE expense_id = ?", (expense_id,))
+            conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _apply(conn, group_id, paid_by, amount_cents, shares, sign):
+        # The payer gets the amount back; everyone in the split owes their share
+        deltas = {paid_by: amount_cents}
+        for name, cents in shares:
+            deltas[name] = deltas.get(name, 0) - cents
+        conn.executemany(
+            "UPDATE members SET balance_cents = balance_cents + ? WHERE group_id = ? AND name = ?",
+            [(sign * delta, group_id, name) for name, delta in deltas.items() if delta],
+        )
+
+    def list_expenses(self, group_id: int, limit: int = 50, offset: int = 0) -> list:
+        """Most recent expenses first; `currency` is None for expenses in the group currency."""
+        rows = self._connect().execute(
+            """SELECT id, description, paid_by, amount_cents, split_type, created_at, currency, original_cents
+               FROM expenses WHERE group_id = ? ORDER BY id DESC LIMIT ? OFFSET ?""",
+            (group_id, limit, offset),
+        ).fetchall()
+        return [
+            {'id': i, 'description': d, 'paid_by': p, 'amount_cents': a, 'split_type': s, 'created_at': c,
+             'currency': cur, 'original_cents': o}
+            for i, d, p, a, s, c, cur, o in rows
+        ]
+
+    def count_expenses(self, group_id: int) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM expenses WHERE group_id = ?", (group_id,)).fetchone()[0]
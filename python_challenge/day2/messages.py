@@ -0,0 +1,96 @@
+"""
+WhatsApp message generation for splitwise.
+Messages for a whole group are templated in one pass, URL-encoded with urllib.parse.quote
+(so non-ASCII names and emoji survive) and rendered as a single HTML block or exported
+as a CSV of wa.me links, instead of one widget per person.
+"""
+
+import html
+import re
+from urllib.parse import quote
+
+import pandas as pd
+import streamlit as st
+
+WA_URL = "https://wa.me/{phone}?text={text}"
+
+MESSAGE_COLUMNS = ["Name", "Phone", "Message", "Link"]
+
+# Up to this many messages are shown as cards; larger groups get a table of links
+MESSAGES_INLINE_LIMIT = 50
+
+
+def wa_link(phone: str, text: str) -> str:
+    # wa.me wants the number as digits only, with the country code
+    return WA_URL.format(phone=re.sub(r"\D", "", str(phone)), text=quote(text, safe=""))
+
+
+def _frame(rows: list) -> pd.DataFrame:
+    """Rows of (name, phone, message) with a phone number, plus their wa.me links."""
+    rows = [(name, phone, text) for name, phone, text in rows if phone]
+    return pd.DataFrame(
+        [(name, phone, text, wa_link(phone, text)) for name, phone, text in rows], columns=MESSAGE_COLUMNS
+    )
+
+
+def _amount(cents: int, currency: str) -> str:
+    return f"{abs(cents) / 100:,.2f} {currency}"
+
+
+def balance_messages(names, balance_cents, phones, currency: str) -> pd.DataFrame:
+    """One message per person with a phone: what they owe or get back overall."""
+    def text(name, cents):
+        if cents < 0:
+            return f"Hey {name}, you owe {_amount(cents, currency)} 💸"
+        if cents > 0:
+            return f"Hey {name}, you’ll get back {_amount(cents, currency)} 🎉"
+        return f"Hey {name}, you’re all settled up ✅"
+
+    return _frame([(name, phone, text(name, int(cents))) for name, cents, phone in zip(names, balance_cents, phones)])
+
+
+def settlement_messages(transfers: list, names, phones, currency: str) -> pd.DataFrame:
+    """
+    "Pay X to Y" messages from settle() transfers [(debtor, creditor, cents), ...].
+    `names` and `phones` map each transfer key to a display name and phone (a list for
+    index keys, a dict for name keys). Everyone with a phone gets one message covering
+    all of their payments.
+    """
+    pays, receives = {}, {}
+    for debtor, creditor, cents in transfers:
+        pays.setdefault(debtor, []).append(f"{_amount(cents, currency)} to {names[creditor]}")
+        receives.setdefault(creditor, []).append(f"{_amount(cents, currency)} from {names[debtor]}")
+
+    rows = []
+    for key, payments in pays.items():
+        rows.append((names[key], phones[key], f"Hey {names[key]}, to settle up please pay {', '.join(payments)} 💸"))
+    for key, payments in receives.items():
+        rows.append((names[key], phones[key], f"Hey {names[key]}, you’ll receive {', '.join(payments)} 🎉"))
+    return _frame(rows)
+
+
+def render_html(messages: pd.DataFrame) -> str:
+    """All messages as one HTML block of whatsapp-box cards."""
+    return "".join(
+        f"<div class='whatsapp-box'>📞 <b>{html.escape(name)}</b><br>{html.escape(text)}<br>"
+        f"<a href='{html.escape(link)}' target='_blank'>Send via WhatsApp</a></div>"
+        for name, text, link in zip(messages["Name"], messages["Message"], messages["Link"])
+    )
+
+
+def to_csv(messages: pd.DataFrame) -> bytes:
+    return messages.to_csv(index=False).encode("utf-8")
+
+
+def show_messages(messages: pd.DataFrame, file_name: str = "whatsapp_messages.csv"):
+    """Render all messages in one widget, with the links as a CSV download."""
+    if messages.empty:
+        st.info("Add phone numbers to send WhatsApp messages.")
+        return
+    if len(messages) <= MESSAGES_INLINE_LIMIT:
+        st.markdown(render_html(messages), unsafe_allow_html=True)
+    else:
+        st.dataframe(messages, use_container_width=True, hide_index=True, column_config={
+            "Link": st.column_config.LinkColumn("Link", display_text="Send via WhatsApp"),
+        })
+    st.download_button("⬇️ Links CSV", to_csv(messages), file_name=file_name, mime="text/csv")
@@ -0,0 +1,148 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from fx import RateTable
+from ledger import Ledger
+from messages import settlement_messages, show_messages
+from settlement import from_cents, settle
+from theme import apply_theme
+
+# -------------- PAGE CONFIG --------------
+st.set_page_config(page_title="Splitwise · Group Ledger", layout="centered")
+apply_theme()
+
+EXPENSES_PAGE_SIZE = 20
+SPLIT_LABELS = {"Equally": "equal", "Exact amounts": "exact", "By shares": "shares"}
+
+
+@st.cache_resource
+def get_ledger() -> Ledger:
+    return Ledger()
+
+
+@st.cache_resource
+def get_rate_table() -> RateTable:
+    return RateTable()
+
+
+ledger = get_ledger()
+fx = get_rate_table()
+currencies = fx.currencies()
+
+# -------------- HEADER --------------
+st.markdown("<h1 class='main-title'>Group Ledger 📒</h1>", unsafe_allow_html=True)
+st.markdown("<p class='subtitle'>Track every expense of a trip or a flat, and settle up once at the end</p>", unsafe_allow_html=True)
+
+# -------------- GROUP --------------
+groups = ledger.list_groups()
+with st.expander("➕ New group", expanded=not groups):
+    col1, col2 = st.columns([2, 1])
+    group_name = col1.text_input("Group name", key="new_group_name")
+    group_currency = col2.selectbox("Currency", currencies, key="new_group_currency",
+                                    index=currencies.index("INR") if "INR" in currencies else 0)
+    if st.button("Create group") and group_name.strip():
+        try:
+            ledger.create_group(group_name.strip(), group_currency)
+            st.rerun()
+        except sqlite3.IntegrityError:
+            st.error(f"A group called '{group_name.strip()}' already exists.")
+
+if not groups:
+    st.stop()
+
+group = st.selectbox("Group", groups, format_func=lambda g: f"{g['name']} ({g['currency']})")
+group_id, currency = group['id'], group['currency']
+
+# -------------- MEMBERS --------------
+balances = ledger.balances(group_id)
+members = [m['name'] for m in balances]
+with st.expander("👥 Members", expanded=not members):
+    col1, col2 = st.columns(2)
+    member_name = col1.text_input("Name", key="new_member_name")
+    member_phone = col2.text_input("Phone (optional)", key="new_member_phone")
+    if st.button("Add member") and member_name.strip():
+        ledger.add_member(group_id, member_name.strip(), member_phone.strip())
+        st.rerun()
+    if members:
+        st.caption(", ".join(members))
+
+if not members:
+    st.stop()
+
+# -------------- ADD EXPENSE --------------
+st.markdown("<h3 class='section-header'>Add an expense 💡</h3>", unsafe_allow_html=True)
+col1, col2, col5 = st.columns([2, 1, 1])
+description = col1.text_input("Description", placeholder="e.g. Dinner")
+expense_currency = col5.selectbox("Paid in", currencies, index=currencies.index(currency) if currency in currencies else 0)
+amount = col2.number_input(f"Amount ({expense_currency})", min_value=0.0, step=1.0)
+col3, col4 = st.columns(2)
+paid_by = col3.selectbox("Paid by", members)
+split_type = SPLIT_LABELS[col4.selectbox("Split", list(SPLIT_LABELS))]
+split_members = st.multiselect("Split between", members, default=members)
+
+amounts = shares = None
+if split_type == "exact":
+    cols = st.columns(min(len(split_members), 4) or 1)
+    amounts = [cols[i % len(cols)].number_input(name, min_value=0.0, step=1.0, key=f"exact_{name}")
+               for i, name in enumerate(split_members)]
+elif split_type == "shares":
+    cols = st.columns(min(len(split_members), 4) or 1)
+    shares = [int(cols[i % len(cols)].number_input(name, min_value=0, value=1, step=1, key=f"shares_{name}"))
+              for i, name in enumerate(split_members)]
+
+if st.button("💾 Add expense"):
+    try:
+        ledger.add_expense(group_id, description.strip() or "Expense", paid_by, amount,
+                           split_type, split_members, amounts=amounts, shares=shares,
+                           currency=expense_currency, rate_table=fx)
+        st.rerun()
+    except ValueError as e:
+        st.error(str(e))
+
+# -------------- BALANCES --------------
+st.markdown("### 💵 Balances")
+st.dataframe(pd.DataFrame(
+    [(m['name'], from_cents(m['balance_cents'])) for m in balances],
+    columns=["Name", f"Balance ({currency})"],
+), use_container_width=True, hide_index=True)
+
+st.markdown("### 🔁 Settle Up")
+transfers = settle({m['name']: m['balance_cents'] for m in balances})
+if transfers:
+    st.dataframe(pd.DataFrame(
+        [(debtor, creditor, from_cents(cents)) for debtor, creditor, cents in transfers],
+        columns=["From", "To", f"Amount ({currency})"],
+    ), use_container_width=True, hide_index=True)
+else:
+    st.success("Everyone is settled up ✅")
+
+if transfers:
+    with st.expander("📲 WhatsApp Messages"):
+        names = {m['name']: m['name'] for m in balances}
+        phones = {m['name']: m['phone'] for m in balances}
+        show_messages(settlement_messages(transfers, names, phones, currency), file_name=f"{group['name']}_settle_up.csv")
+
+# -------------- EXPENSES --------------
+total_expenses = ledger.count_expenses(group_id)
+if total_expenses:
+    st.markdown(f"### 🧾 Expenses ({total_expenses})")
+    pages = (total_expenses - 1) // EXPENSES_PAGE_SIZE + 1
+    page = int(st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)) if pages > 1 else 1
+    expenses = ledger.list_expenses(group_id, EXPENSES_PAGE_SIZE, (page - 1) * EXPENSES_PAGE_SIZE)
+    st.dataframe(pd.DataFrame(
+        [(e['id'], datetime.fromtimestamp(e['created_at']).strftime('%d %b %H:%M'), e['description'],
+          e['paid_by'], from_cents(e['amount_cents']),
+          f"{from_cents(e['original_cents']):,.2f} {e['currency']}" if e['currency'] else "", e['split_type'])
+         for e in expenses],
+        columns=["#", "When", "Description", "Paid by", f"Amount ({currency})", "Paid in", "Split"],
+    ), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns([3, 1])
+    to_delete = col1.selectbox("Delete expense", [e['id'] for e in expenses],
+                               format_func=lambda i: f"#{i} {next(e['description'] for e in expenses if e['id'] == i)}")
+    if col2.button("🗑️ Delete"):
+        ledger.delete_expense(to_delete)
+        st.rerun()
@@ -0,0 +1,95 @@
+"""
+Debt settlement for splitwise.
+Amounts are integer cents, so balances always add up exactly. Balances are turned into
+a short list of "X pays Y" transfers: exact matches are paired off first, then the
+largest debtor pays the largest creditor (two heaps) until everyone is settled. That
+needs at most n - 1 transfers for n people with a non-zero balance.
+"""
+
+import heapq
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+
+def to_cents(amount) -> int:
+    """Convert an amount (float, str or Decimal) to integer cents, rounding half up."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+def to_cents_array(amounts) -> np.ndarray:
+    """
+    Convert a column of amounts to integer cents with the same half-up rule as to_cents.
+    Rounding to 6 decimals first absorbs float noise (2.125 * 100 is 212.49999...).
+    """
+    scaled = np.round(np.asarray(amounts, dtype=np.float64) * 100, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+def split_cents(total_cents: int, n: int, shares=None) -> np.ndarray:
+    """
+    Split a total into n parts in cents: equal (differing by at most one cent), or in
+    proportion to integer share weights (e.g. [2, 1, 1]). Leftover cents go to the
+    largest remainders, so the parts always add up exactly.
+    """
+    if shares is None:
+        base, remainder = divmod(total_cents, n)
+        return base + (np.arange(n) < remainder).astype(np.int64)
+    shares = np.asarray(shares, dtype=np.int64)
+    weight = int(shares.sum())
+    if weight <= 0:
+        raise ValueError("Shares must add up to more than zero.")
+    scaled = total_cents * shares
+    parts = scaled // weight
+    leftover = total_cents - int(parts.sum())
+    parts[np.argsort(-(scaled % weight), kind="stable")[:leftover]] += 1
+    return parts
+
+
+def split_exact(total_cents: int, amounts_cents: list) -> list:
+    """Use explicit per-person amounts, which must add up to the total."""
+    if sum(amounts_cents) != total_cents:
+        raise ValueError(f"Amounts add up to {from_cents(sum(amounts_cents)):.2f}, not {from_cents(total_cents):.2f}.")
+    return list(amounts_cents)
+
+
+def settle(balances: dict) -> list:
+    """
+    Turn {person: balance_cents} into transfers [(debtor, creditor, cents), ...].
+    Balances must add up to zero.
+    """
+    if sum(balances.values()) != 0:
+        raise ValueError("Balances do not add up to zero; contributions must match the total.")
+
+    transfers = []
+    # Pair off exact opposite amounts first: one transfer settles two people
+    creditors_by_amount = {}
+    for person, cents in balances.items():
+        if cents > 0:
+            creditors_by_amount.setdefault(cents, []).append(person)
+    debtors = []
+    for person, cents in balances.items():
+        if cents < 0:
+            matches = creditors_by_amount.get(-cents)
+            if matches:
+                transfers.append((person, matches.pop(), -cents))
+            else:
+                debtors.append((cents, person))  # negative: heapq pops the largest debt first
+    creditors = [(-cents, person) for cents, people in creditors_by_amount.items() for person in people]
+
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+    while debtors and creditors:
+        debt, debtor = heapq.heappop(debtors)
+        credit, creditor = heapq.heappop(creditors)
+        amount = min(-debt, -credit)
+        transfers.append((debtor, creditor, amount))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+    return transfers
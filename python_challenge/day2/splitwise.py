@@ -1,101 +1,32 @@
 import streamlit as st
 import pandas as pd
 
+from bulk import TEMPLATE_CSV, compute_split, convert_contributions, load_participants
+from fx import RateTable
+from messages import balance_messages, settlement_messages, show_messages
+from settlement import from_cents, settle, to_cents, to_cents_array
+from theme import apply_theme
+
+RESULTS_PAGE_SIZE = 50
+
+# How far (in cents) a typed total may be from the sum of currency-converted contributions
+# and still be treated as that sum
+FX_TOLERANCE_CENTS = 50
+
+# Parsed once per uploaded file, not on every rerun
+read_participants = st.cache_data(max_entries=8, show_spinner=False)(load_participants)
+
+
+@st.cache_resource
+def get_rate_table() -> RateTable:
+    # One table per server process; it reloads its rates itself once they expire
+    return RateTable()
+
 # -------------- PAGE CONFIG --------------
 st.set_page_config(page_title="Splitwise", layout="centered")
 
 # -------------- CUSTOM CSS --------------
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap');
-
-html, body, [class*="css"] {
-    font-family: 'Poppins', sans-serif !important;
-    background: linear-gradient(135deg, #89f7fe, #66a6ff);
-    color: #222;
-}
-
-h1, h2, h3, h4 {
-    text-align: center;
-    font-weight: 600 !important;
-}
-
-.stApp {
-    background: linear-gradient(135deg, #89f7fe, #66a6ff);
-}
-
-.main-title {
-    text-align: center;
-    font-size: 2rem;
-    font-weight: 700;
-    color: #1e1e1e;
-    margin-bottom: 0.3em;
-}
-
-.subtitle {
-    text-align: center;
-    font-size: 1rem;
-    opacity: 0.8;
-    margin-bottom: 2em;
-}
-
-/* Card container styling */
-.block-container {
-    background: rgba(255, 255, 255, 0.9);
-    border-radius: 20px;
-    padding: 3rem 3rem 2rem 3rem;
-    box-shadow: 0 8px 30px rgba(0,0,0,0.15);
-    margin-top: 2rem;
-}
-
-/* Style input boxes */
-.stTextInput>div>div>input,
-.stNumberInput>div>div>input {
-    border-radius: 12px;
-    border: 1px solid #dcdcdc;
-    padding: 10px;
-}
-
-.stTextInput>div>div>input:focus,
-.stNumberInput>div>div>input:focus {
-    border-color: #66a6ff;
-    box-shadow: 0 0 0 3px rgba(102,166,255,0.3);
-}
-
-/* Buttons */
-.stButton>button {
-    background: linear-gradient(90deg, #667eea, #764ba2);
-    color: white;
-    border-radius: 12px;
-    padding: 0.6em 1.5em;
-    font-weight: 600;
-    border: none;
-    transition: all 0.2s ease-in-out;
-}
-
-.stButton>button:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-}
-
-/* Section headers */
-.section-header {
-    font-size: 1.3rem;
-    font-weight: 600;
-    margin-top: 1.5em;
-    color: #333;
-}
-
-/* WhatsApp message box */
-.whatsapp-box {
-    background: #e0ffe0;
-    border-left: 5px solid #25D366;
-    padding: 1em;
-    border-radius: 10px;
-    margin-top: 1em;
-}
-</style>
-""", unsafe_allow_html=True)
+apply_theme()
 
 # -------------- HEADER --------------
 st.markdown("<h1 class='main-title'>Split Your Expense</h1>", unsafe_allow_html=True)
@@ -104,50 +35,112 @@ st.markdown("<p class='subtitle'>Split bills fairly, settle instantly, and share
 # -------------- INPUT SECTION --------------
 st.markdown("<h3 class='section-header'>Enter expense details 💡</h3>", unsafe_allow_html=True)
 
+fx = get_rate_table()
+currencies = fx.currencies()
+
 col1, col2 = st.columns(2)
-currency = col1.selectbox("Currency", ["INR", "USD", "EUR", "GBP"])
-total_amount = col2.number_input("Total amount", min_value=0.0, value=0.0, step=1.0, format="%.0f")
+currency = col1.selectbox("Currency", currencies, index=currencies.index("INR") if "INR" in currencies else 0)
+total_amount = col2.number_input("Total amount", min_value=0.0, value=0.0, step=1.0, format="%.0f",
+                                 help="Leave at 0 to split the sum of the contributions.")
 
 col3, col4 = st.columns(2)
-num_people = int(col3.number_input("Number of people", min_value=1, value=1, step=1))
+input_mode = col4.radio("Participants from", ["Manual entry", "Bulk import"], horizontal=True)
 
 # -------------- PARTICIPANTS INPUT --------------
 st.markdown("<h3 class='section-header'>Participants 🧑‍🤝‍🧑</h3>", unsafe_allow_html=True)
 
-participants = []
-for i in range(num_people):
-    st.markdown(f"**Name #{i+1}**")
-    cols = st.columns([2, 1, 2])
-    name = cols[0].text_input(f"Name {i+1}", key=f"name_{i}")
-    contributed = cols[1].number_input(f"Contributed {i+1}", min_value=0.0, step=1.0, key=f"contrib_{i}")
-    phone = cols[2].text_input(f"Phone (optional) {i+1}", key=f"phone_{i}")
-    participants.append((name, contributed, phone))
+if input_mode == "Manual entry":
+    num_people = int(col3.number_input("Number of people", min_value=1, value=1, step=1))
+    participants = []
+    for i in range(num_people):
+        st.markdown(f"**Name #{i+1}**")
+        cols = st.columns([2, 1, 1, 2])
+        name = cols[0].text_input(f"Name {i+1}", key=f"name_{i}")
+        contributed = cols[1].number_input(f"Contributed {i+1}", min_value=0.0, step=1.0, key=f"contrib_{i}")
+        paid_in = cols[2].selectbox(f"Currency {i+1}", currencies, index=currencies.index(currency), key=f"currency_{i}")
+        phone = cols[3].text_input(f"Phone (optional) {i+1}", key=f"phone_{i}")
+        participants.append((name, contributed, paid_in, phone))
+    participants_df = pd.DataFrame(participants, columns=["Name", "Contributed", "Currency", "Phone"])
+else:
+    st.caption("Upload a CSV or Excel file with **Name** and **Contributed** columns, plus optional "
+               "**Currency** (converted to the currency above), **Phone** and **Shares** (weights for an "
+               "unequal split). Leave the total at 0 to split the sum of the contributions.")
+    st.download_button("⬇️ Template CSV", TEMPLATE_CSV, file_name="participants.csv", mime="text/csv")
+    uploaded = st.file_uploader("Participants file", type=["csv", "xlsx", "xls"])
+    participants_df = None
+    if uploaded is not None:
+        try:
+            participants_df = read_participants(uploaded.getvalue(), uploaded.name)
+            st.caption(f"{len(participants_df)} participants loaded from {uploaded.name}")
+        except (ValueError, ImportError) as e:
+            st.error(f"Could not read {uploaded.name}: {e}")
 
 # -------------- CALCULATION --------------
 if st.button("💰 Calculate Split"):
-    if total_amount <= 0 or num_people <= 0:
+    st.session_state.calculated = True
+
+if st.session_state.get("calculated"):
+    split_contributions = total_amount == 0
+    if participants_df is None or participants_df.empty:
         st.error("Please enter valid amount and participants.")
     else:
-        avg_share = total_amount / num_people
-        results = []
-        for name, contributed, phone in participants:
-            balance = round(contributed - avg_share, 2)
-            results.append((name, contributed, balance, phone))
+        try:
+            # Contributions in other currencies are converted in one pass with the cached rates
+            participants_df = convert_contributions(participants_df, fx, currency)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        if "Paid" in participants_df and not split_contributions:
+            # Converted contributions rarely add up to a whole-unit total exactly; within the
+            # tolerance, split their converted sum so everything still settles to the cent
+            converted_total = int(to_cents_array(participants_df["Contributed"]).sum())
+            if abs(converted_total - to_cents(total_amount)) <= FX_TOLERANCE_CENTS:
+                split_contributions = True
+                st.caption(f"Total taken as {from_cents(converted_total):,.2f} {currency}, "
+                           f"the sum of the converted contributions.")
+        try:
+            # Shares and balances are whole-column integer-cent operations
+            df = compute_split(participants_df, None if split_contributions else total_amount)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        df["Name"] = df["Name"].where(df["Name"] != "", "Person " + (df.index + 1).astype(str))
+        balance_cents = to_cents_array(df["Balance"])
+        contributed_total = int(to_cents_array(df["Contributed"]).sum())
+        total_cents = contributed_total if split_contributions else to_cents(total_amount)
 
-        df = pd.DataFrame(results, columns=["Name", "Contributed", "Balance", "Phone"])
         st.markdown("### 💵 Results")
-        st.dataframe(df, use_container_width=True)
-
-        # Generate WhatsApp messages
+        pages = (len(df) - 1) // RESULTS_PAGE_SIZE + 1
+        page = int(st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)) if pages > 1 else 1
+        start = (page - 1) * RESULTS_PAGE_SIZE
+        st.dataframe(df.iloc[start:start + RESULTS_PAGE_SIZE], use_container_width=True)
+        if pages > 1:
+            st.caption(f"Showing {start + 1}-{min(start + RESULTS_PAGE_SIZE, len(df))} of {len(df)} participants")
+
+        # Who pays whom
+        st.markdown("### 🔁 Settle Up")
+        if contributed_total != total_cents:
+            st.warning(f"Contributions add up to {from_cents(contributed_total):.2f} {currency}, "
+                       f"not {from_cents(total_cents):.2f} {currency}. Fix them to see who pays whom.")
+        else:
+            names = df["Name"].tolist()
+            transfers = settle(dict(enumerate(balance_cents.tolist())))
+            if transfers:
+                st.dataframe(pd.DataFrame(
+                    [(names[debtor], names[creditor], from_cents(cents)) for debtor, creditor, cents in transfers],
+                    columns=["From", "To", f"Amount ({currency})"],
+                ), use_container_width=True)
+                st.caption(f"{len(transfers)} payment(s) settle the whole group.")
+            else:
+                st.success("Everyone is settled up ✅")
+
+        # WhatsApp messages for everyone with a phone, generated in one pass
         st.markdown("### 📲 WhatsApp Messages")
-        for name, contributed, balance, phone in results:
-            if phone:
-                if balance < 0:
-                    msg = f"Hey {name}, you owe {abs(balance)} {currency} 💸"
-                elif balance > 0:
-                    msg = f"Hey {name}, you’ll get back {balance} {currency} 🎉"
-                else:
-                    msg = f"Hey {name}, you’re all settled up ✅"
-
-                wa_link = f"https://wa.me/{phone}?text={msg.replace(' ', '%20')}"
-                st.markdown(f"<div class='whatsapp-box'>📞 <b>{name}</b><br>{msg}<br><a href='{wa_link}' target='_blank'>Send via WhatsApp</a></div>", unsafe_allow_html=True)
+        phones = df["Phone"].tolist() if "Phone" in df else [""] * len(df)
+        message_type = st.radio("Message", ["Balances", "Who pays whom"], horizontal=True,
+                                disabled=contributed_total != total_cents)
+        if message_type == "Who pays whom" and contributed_total == total_cents and transfers:
+            messages = settlement_messages(transfers, names, phones, currency)
+        else:
+            messages = balance_messages(df["Name"], balance_cents, phones, currency)
+        show_messages(messages)
@@ -0,0 +1,99 @@
+"""Shared look of the splitwise pages."""
+
+import streamlit as st
+
+CUSTOM_CSS = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap');
+
+html, body, [class*="css"] {
+    font-family: 'Poppins', sans-serif !important;
+    background: linear-gradient(135deg, #89f7fe, #66a6ff);
+    color: #222;
+}
+
+h1, h2, h3, h4 {
+    text-align: center;
+    font-weight: 600 !important;
+}
+
+.stApp {
+    background: linear-gradient(135deg, #89f7fe, #66a6ff);
+}
+
+.main-title {
+    text-align: center;
+    font-size: 2rem;
+    font-weight: 700;
+    color: #1e1e1e;
+    margin-bottom: 0.3em;
+}
+
+.subtitle {
+    text-align: center;
+    font-size: 1rem;
+    opacity: 0.8;
+    margin-bottom: 2em;
+}
+
+/* Card container styling */
+.block-container {
+    background: rgba(255, 255, 255, 0.9);
+    border-radius: 20px;
+    padding: 3rem 3rem 2rem 3rem;
+    box-shadow: 0 8px 30px rgba(0,0,0,0.15);
+    margin-top: 2rem;
+}
+
+/* Style input boxes */
+.stTextInput>div>div>input,
+.stNumberInput>div>div>input {
+    border-radius: 12px;
+    border: 1px solid #dcdcdc;
+    padding: 10px;
+}
+
+.stTextInput>div>div>input:focus,
+.stNumberInput>div>div>input:focus {
+    border-color: #66a6ff;
+    box-shadow: 0 0 0 3px rgba(102,166,255,0.3);
+}
+
+/* Buttons */
+.stButton>button {
+    background: linear-gradient(90deg, #667eea, #764ba2);
+    color: white;
+    border-radius: 12px;
+    padding: 0.6em 1.5em;
+    font-weight: 600;
+    border: none;
+    transition: all 0.2s ease-in-out;
+}
+
+.stButton>button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 4px 15px rgba(0,0,0,0.2);
+}
+
+/* Section headers */
+.section-header {
+    font-size: 1.3rem;
+    font-weight: 600;
+    margin-top: 1.5em;
+    color: #333;
+}
+
+/* WhatsApp message box */
+.whatsapp-box {
+    background: #e0ffe0;
+    border-left: 5px solid #25D366;
+    padding: 1em;
+    border-radius: 10px;
+    margin-top: 1em;
+}
+</style>
+"""
+
+
+def apply_theme():
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
@@ -1,55 +1,326 @@
 #!/usr/bin/env python3
 """
 Quick weather using wttr.in (no API key).
+Many cities (arguments and/or a file) are fetched concurrently over one shared
+requests.Session, and each result is printed as soon as it arrives, with its latency.
+Responses are cached on disk (see weather_cache.py): recent ones are served without a
+request, and older ones are used when the network fails or with --offline. Requests
+are retried with backoff behind a circuit breaker (see weather_http.py). --watch keeps
+one warm session polling the cities and reports only meaningful changes. Each response
+is parsed once into a typed record (see weather_record.py) and printed as text, JSON,
+streaming NDJSON, CSV or a table.
 """
 
 import requests
 import argparse
+import csv
+import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
 
-WTTR_URL = "https://wttr.in/{}?format=j1"  # returns JSON
-
-def get_wttr(city: str):
-    url = WTTR_URL.format(city)
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
-
-def format_wttr(data: dict):
-    # wttr.in structure: current_condition is a list with a single dict
-    current = data.get("current_condition", [{}])[0]
-    temp_C = current.get("temp_C")
-    temp_F = current.get("temp_F")
-    weather_desc = current.get("weatherDesc", [{}])[0].get("value", "")
-    humidity = current.get("humidity")
-    feels_like_C = current.get("FeelsLikeC")
-    wind_kmph = current.get("windspeedKmph")
-    precip_mm = current.get("precipMM")
-
-    return (
-        f"Condition: {weather_desc}\n"
-        f"Temperature: {temp_C} °C / {temp_F} °F\n"
-        f"Feels like: {feels_like_C} °C\n"
-        f"Humidity: {humidity}%\n"
-        f"Wind: {wind_kmph} km/h\n"
-        f"Precipitation: {precip_mm} mm\n"
+from weather_cache import ResponseCache
+from weather_http import ResilientClient
+from weather_record import Weather
+
+# Override to point at a mirror or a local stub server
+WTTR_BASE_URL = os.getenv("WTTR_BASE_URL", "https://wttr.in")
+WTTR_URL = "{}/{}?format=j1"  # returns JSON
+DEFAULT_WORKERS = 16
+DEFAULT_MAX_AGE = 600  # seconds a cached response counts as fresh
+DEFAULT_TEMP_DELTA = 1.0  # °C change reported in --watch mode
+FORMATS = ["text", "json", "ndjson", "csv", "table"]
+
+def make_session(workers: int = DEFAULT_WORKERS):
+    # One connection pool shared by all worker threads, sized so none of them waits for a socket
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def wttr_source(base_url: str = WTTR_BASE_URL) -> str:
+    """The endpoint and query get_wttr uses, minus the city: the cache key's source."""
+    return WTTR_URL.format(base_url.rstrip("/"), "")
+
+def get_wttr(city: str, client, base_url: str = WTTR_BASE_URL):
+    """(data, retries) for a city."""
+    return client.get_json(WTTR_URL.format(base_url.rstrip("/"), quote(city)))
+
+def parse_wttr(city: str, data):
+    """Weather record from a j1 body; ValueError if the body is not a usable j1 object."""
+    if not isinstance(data, dict):
+        raise ValueError(f"unexpected response for {city}: expected a JSON object, got {type(data).__name__}")
+    try:
+        return Weather.from_j1(city, data)
+    except (AttributeError, TypeError, KeyError, IndexError) as e:
+        raise ValueError(f"unexpected response for {city}: {e}") from e
+
+def fetch_all(cities: list, client, workers: int = DEFAULT_WORKERS, cache=None,
+              max_age: float = DEFAULT_MAX_AGE, offline: bool = False, base_url: str = WTTR_BASE_URL):
+    """
+    Fetch cities concurrently; yields a result dict per city in completion order:
+    {'city', 'weather', 'error', 'latency', 'age', 'retries'}, where weather is the
+    parsed Weather record. age is None for a fresh response, else the age in seconds of
+    the cached one served.
+    """
+    source = wttr_source(base_url)
+
+    def fetch(city):
+        started = time.perf_counter()
+        result = {'city': city, 'weather': None, 'error': None, 'age': None, 'retries': 0}
+        cached = cache.get(city, source) if cache else None
+        if cached:
+            try:
+                cached = parse_wttr(city, cached[0]), cached[1]
+            except ValueError:
+                cached = None  # an unreadable entry is treated as a miss
+        if cached and (offline or cached[1] <= max_age):
+            result['weather'], result['age'] = cached
+        elif offline:
+            result['error'] = LookupError(f"no cached data for {city}")
+        else:
+            try:
+                data, result['retries'] = get_wttr(city, client, base_url)
+                # Parsed here, in the worker thread, so the printing loop only formats;
+                # only bodies that parse are cached
+                result['weather'] = parse_wttr(city, data)
+                if cache:
+                    cache.put(city, data, source)
+            except (requests.RequestException, ValueError) as e:
+                result['retries'] = getattr(e, 'retries', result['retries'])
+                if cached:
+                    # Stale data beats no data when the upstream is unreachable
+                    result['weather'], result['age'] = cached
+                else:
+                    result['error'] = e
+        result['latency'] = time.perf_counter() - started
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(cities)))) as pool:
+        for future in as_completed([pool.submit(fetch, city) for city in cities]):
+            yield future.result()
+
+def fmt(value):
+    """Numbers without a needless '.0'; missing values as '-'."""
+    if value is None:
+        return "-"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+def format_wttr(weather: Weather, forecast: bool = False):
+    text = (
+        f"Condition: {weather.weather_desc}\n"
+        f"Temperature: {fmt(weather.temp_c)} °C / {fmt(weather.temp_f)} °F\n"
+        f"Feels like: {fmt(weather.feels_like_c)} °C\n"
+        f"Humidity: {fmt(weather.humidity)}%\n"
+        f"Wind: {fmt(weather.wind_kmph)} km/h\n"
+        f"Precipitation: {fmt(weather.precip_mm)} mm\n"
     )
+    if forecast:
+        for day in weather.days:
+            text += (f"{day.date}: {fmt(day.min_temp_c)}-{fmt(day.max_temp_c)} °C, "
+                     f"{fmt(day.sun_hours)} h of sun\n")
+            for hour in day.hours:
+                text += (f"  {hour.time}  {fmt(hour.temp_c):>4} °C  {fmt(hour.chance_of_rain):>3}% rain  "
+                         f"{hour.weather_desc}\n")
+    return text
+
+def format_table(rows: list, columns: tuple):
+    cells = [[fmt(row.get(column)) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[i]) for line in cells]) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths)),
+             "  ".join("-" * width for width in widths)]
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in cells]
+    return "\n".join(lines)
+
+def format_error(error: Exception):
+    if isinstance(error, requests.HTTPError):
+        return f"HTTP error: {error}"
+    if isinstance(error, ValueError):  # includes requests' JSONDecodeError
+        return f"Bad response: {error}"
+    if isinstance(error, requests.RequestException):
+        return f"Network error: {error}"
+    return f"Error: {error}"
+
+def format_age(age: float):
+    return f"{age:.0f} s" if age < 60 else f"{age / 60:.0f} min" if age < 3600 else f"{age / 3600:.1f} h"
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def condition_changes(previous: Weather, current: Weather, temp_delta: float = DEFAULT_TEMP_DELTA):
+    """
+    Changes worth reporting between two readings, as {field: [old, new]}: temperature
+    moving by temp_delta °C or more, precipitation starting or stopping, and a new
+    weather description.
+    """
+    changes = {}
+    if (previous.temp_c is not None and current.temp_c is not None
+            and abs(current.temp_c - previous.temp_c) >= temp_delta):
+        changes["temp_c"] = [previous.temp_c, current.temp_c]
+    old_precip, new_precip = previous.precip_mm or 0.0, current.precip_mm or 0.0
+    if (old_precip > 0) != (new_precip > 0):
+        changes["precip_mm"] = [old_precip, new_precip]
+    if previous.weather_desc != current.weather_desc:
+        changes["weather_desc"] = [previous.weather_desc, current.weather_desc]
+    return changes
+
+def format_changes(changes: dict):
+    parts = []
+    if "temp_c" in changes:
+        parts.append("temperature {} → {} °C".format(*map(fmt, changes["temp_c"])))
+    if "precip_mm" in changes:
+        old, new = changes["precip_mm"]
+        parts.append(f"precipitation started ({fmt(new)} mm)" if new > 0 else "precipitation stopped")
+    if "weather_desc" in changes:
+        parts.append("{} → {}".format(*changes["weather_desc"]))
+    return ", ".join(parts)
+
+def watch(cities: list, client, args):
+    """Poll the cities every args.watch seconds, printing only changes (JSON lines unless --format text)."""
+    as_json = args.format != "text"
+    last = {}  # city -> last Weather, or the error message while failing
+    while True:
+        started = time.monotonic()
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        # Always fetch fresh; the last reading of each city is kept in memory to diff against
+        for result in fetch_all(cities, client, args.workers, None, 0, False, args.base_url):
+            city, error, current = result['city'], result['error'], result['weather']
+            if error is not None:
+                event = {'time': stamp, 'city': city, 'error': format_error(error)}
+                if last.get(city) != event['error']:
+                    last[city] = event['error']
+                    print(json.dumps(event) if as_json else f"[{stamp}] {city}: {event['error']}", flush=True)
+                continue
+            previous = last.get(city)
+            if isinstance(previous, Weather):
+                changes = condition_changes(previous, current, args.temp_delta)
+                if not changes:
+                    continue
+                text = format_changes(changes)
+            else:
+                # First reading, or recovered from an error
+                changes = None
+                text = f"{fmt(current.temp_c)} °C, {current.weather_desc}"
+            last[city] = current
+            if as_json:
+                print(json.dumps({'time': stamp, 'city': city, 'changes': changes, 'current': current.current()}),
+                      flush=True)
+            else:
+                print(f"[{stamp}] {city}: {text}", flush=True)
+        time.sleep(max(0.0, args.watch - (time.monotonic() - started)))
+
+def read_cities(args):
+    cities = list(args.cities)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            cities += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    # Keep the first occurrence of each city, in order
+    return list(dict.fromkeys(cities))
+
+def percentile(values: list, pct: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
 
 def main():
     parser = argparse.ArgumentParser(description="Show weather via wttr.in (no API key).")
-    parser.add_argument("city", help="City name (e.g., 'Chennai' or 'London')")
+    parser.add_argument("cities", nargs="*", metavar="city", help="City names (e.g., 'Chennai' 'London')")
+    parser.add_argument("-f", "--file", help="File with one city per line (# starts a comment)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE,
+                        help=f"Serve cached responses younger than this many seconds (default {DEFAULT_MAX_AGE})")
+    parser.add_argument("--offline", action="store_true", help="Only use cached responses, however old")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the response cache")
+    parser.add_argument("--base-url", default=WTTR_BASE_URL, help=f"wttr.in base URL (default {WTTR_BASE_URL})")
+    parser.add_argument("--retries", type=int, default=3, help="Retries on timeouts and 5xx responses")
+    parser.add_argument("--connect-timeout", type=float, default=3.05, help="Seconds to wait for a connection")
+    parser.add_argument("--read-timeout", type=float, default=10.0, help="Seconds to wait for a response")
+    parser.add_argument("--watch", type=float, metavar="INTERVAL",
+                        help="Poll every INTERVAL seconds and report only changes")
+    parser.add_argument("--temp-delta", type=float, default=DEFAULT_TEMP_DELTA,
+                        help=f"Temperature change in °C that --watch reports (default {DEFAULT_TEMP_DELTA})")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="text, json (one document), ndjson (a line per city as it arrives), csv or table")
+    parser.add_argument("--forecast", action="store_true",
+                        help="Include the hourly forecast (csv and table print one row per forecast hour)")
     args = parser.parse_args()
 
-    try:
-        data = get_wttr(args.city)
-    except requests.HTTPError as e:
-        print("HTTP error:", e)
-        sys.exit(1)
-    except requests.RequestException as e:
-        print("Network error:", e)
-        sys.exit(1)
+    cities = read_cities(args)
+    if not cities:
+        parser.error("give at least one city or --file")
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch INTERVAL must be greater than 0")
+    if args.watch is not None and args.format in ("csv", "table"):
+        parser.error("--watch supports --format text, json or ndjson")
 
-    print(format_wttr(data))
+    cache = None if args.no_cache else ResponseCache()
+    latencies, failed, retries = [], 0, 0
+    with make_session(args.workers) as session:
+        client = ResilientClient(session, retries=args.retries,
+                                 connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+        if args.watch is not None:
+            try:
+                watch(cities, client, args)
+            except KeyboardInterrupt:
+                return
+        columns = Weather.FORECAST_FIELDS if args.forecast else Weather.CURRENT_FIELDS
+        if args.format == "csv":
+            out = csv.DictWriter(sys.stdout, columns, extrasaction="ignore")
+            out.writeheader()
+        collected = {}  # city -> json records or table rows, printed in input order at the end
+        for result in fetch_all(cities, client, args.workers, cache, args.max_age, args.offline, args.base_url):
+            city, weather, error, age = result['city'], result['weather'], result['error'], result['age']
+            latencies.append(result['latency'])
+            retries += result['retries']
+            failed += error is not None
+            if args.format == "text":
+                if len(cities) == 1:
+                    if age is not None and age > args.max_age:
+                        print(f"(stale: cached {format_age(age)} ago)", file=sys.stderr)
+                    print(format_wttr(weather, args.forecast) if error is None else format_error(error))
+                else:
+                    notes = [f"{result['latency'] * 1000:.0f} ms"]
+                    if result['retries']:
+                        notes.append(f"{result['retries']} retries")
+                    if age is not None:
+                        notes.append(f"cached {format_age(age)} ago")
+                    print(f"== {city} ({', '.join(notes)}) ==")
+                    print(format_wttr(weather, args.forecast) if error is None else format_error(error) + "\n",
+                          flush=True)
+            elif args.format in ("json", "ndjson"):
+                record = {'city': city, 'error': format_error(error)} if error is not None else weather.to_dict()
+                record.update(latency_ms=round(result['latency'] * 1000, 1), retries=result['retries'], age_s=age)
+                if args.format == "ndjson":
+                    print(json.dumps(record), flush=True)
+                else:
+                    collected[city] = record
+            elif error is not None:
+                print(f"{city}: {format_error(error)}", file=sys.stderr)
+            else:
+                rows = weather.forecast_rows() if args.forecast else [weather.current()]
+                if args.format == "csv":
+                    out.writerows(rows)
+                    sys.stdout.flush()
+                else:
+                    collected[city] = rows
+
+        if args.format == "json":
+            records = [collected[city] for city in cities]
+            print(json.dumps(records[0] if len(records) == 1 else records, indent=2))
+        elif args.format == "table":
+            print(format_table([row for city in cities for row in collected.get(city, [])], columns))
+
+    if len(cities) > 1:
+        print(f"{len(cities) - failed}/{len(cities)} ok, {retries} retries, latency "
+              f"p50 {percentile(latencies, 50) * 1000:.0f} ms, p95 {percentile(latencies, 95) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 99) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
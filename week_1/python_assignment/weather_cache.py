@@ -0,0 +1,88 @@
+"""
+On-disk cache of wttr.in responses for weatherUpdate.py (SQLite).
+Entries are keyed by source (the endpoint and query a body came from, so responses from
+a mirror or stub are never served as another's) and normalized city name, and stamped
+with their fetch time, so callers decide how old is still fresh; the least recently
+used entries are evicted beyond max_entries. One connection per thread, so the fetch pool can share one cache.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Under the home directory so cron jobs share the cache whatever their working directory
+WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "wttr.db"))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+def normalize(city: str) -> str:
+    """'  new   York ' and 'New York' share one entry."""
+    return " ".join(city.lower().split())
+
+
+def cache_key(city: str, source: str = "") -> str:
+    return f"{source} {normalize(city)}" if source else normalize(city)
+
+
+class ResponseCache:
+    def __init__(self, path: str = WEATHER_CACHE_PATH, max_entries: int = WEATHER_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, city: str, source: str = ""):
+        """(data, age_seconds) for a city cached from `source`, or None."""
+        key = cache_key(city, source)
+        conn = self._connect()
+        row = conn.execute("SELECT fetched_at, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[1]), now - row[0]
+
+    def put(self, city: str, data: dict, source: str = ""):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, fetched_at, accessed_at, body) VALUES (?, ?, ?, ?)",
+                (cache_key(city, source), now, now, json.dumps(data)),
+            )
+            conn.execute(
+                """DELETE FROM responses WHERE key NOT IN
+                   (SELECT key FROM responses ORDER BY accessed_at DESC LIMIT ?)""",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
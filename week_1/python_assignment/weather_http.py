@@ -0,0 +1,120 @@
+"""
+Resilient HTTP GETs for weatherUpdate.py.
+Timeouts, connection errors and 429/5xx responses are retried with jittered exponential
+backoff, connect and read timeouts are separate, and a per-host circuit breaker makes
+calls fail fast once a host keeps failing instead of making every city wait out its
+own retries.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without a request while a host's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens a host's circuit after `failure_threshold` consecutive failures. After
+    `reset_after` seconds one trial request is let through (half-open): success closes
+    the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._hosts = {}  # host -> {'failures', 'opened_at', 'trial'}
+        self._lock = threading.Lock()
+
+    def before(self, host: str):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state['opened_at'] is None:
+                return
+            wait = state['opened_at'] + self.reset_after - time.monotonic()
+            if wait > 0 or state['trial']:
+                raise CircuitOpenError(f"circuit open for {host} (retry in {max(wait, 0):.0f} s)")
+            state['trial'] = True
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'opened_at': None, 'trial': False})
+            state['failures'] += 1
+            if state['trial'] or state['failures'] >= self.failure_threshold:
+                state['opened_at'] = time.monotonic()
+                state['trial'] = False
+
+
+class ResilientClient:
+    """GETs JSON over a shared session with retries, split timeouts and a circuit breaker."""
+
+    def __init__(self, session, retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0, breaker=None):
+        self.session = session
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+
+    def get_json(self, url: str):
+        """
+        (data, retries) for a URL. On failure the last error is raised with the number of
+        retries made as its `retries` attribute.
+        """
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before(host)
+            except CircuitOpenError as e:
+                e.retries = attempt
+                raise
+            # From here every attempt records a success or failure, so a half-open trial always settles
+            try:
+                resp = self.session.get(url, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self.breaker.record_failure(host)
+                if attempt < self.retries:
+                    self._sleep(attempt)
+                    attempt += 1
+                    continue
+                e.retries = attempt
+                raise
+            except Exception as e:
+                self.breaker.record_failure(host)
+                e.retries = attempt
+                raise
+            if resp.status_code in RETRY_STATUSES:
+                self.breaker.record_failure(host)
+                if attempt < self.retries:
+                    self._sleep(attempt, resp.headers.get("Retry-After"))
+                    attempt += 1
+                    continue
+            else:
+                # Any other answer, even a 404, means the host is up
+                self.breaker.record_success(host)
+            try:
+                resp.raise_for_status()
+                return resp.json(), attempt
+            except requests.RequestException as e:
+                e.retries = attempt
+                raise
+
+    def _sleep(self, attempt: int, retry_after: str | None = None):
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        time.sleep(delay)
@@ -0,0 +1,116 @@
+"""
+Typed weather records for weatherUpdate.py.
+A wttr.in j1 payload is parsed once into slotted dataclasses - current conditions plus
+the forecast days and their hours - with numbers converted, so output formats read
+attributes instead of walking the raw dict.
+"""
+
+from dataclasses import asdict, dataclass, field
+
+
+def _num(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _desc(entry: dict) -> str:
+    return (entry.get("weatherDesc") or [{}])[0].get("value", "").strip()
+
+
+@dataclass(slots=True)
+class Hour:
+    time: str  # "HH:MM"
+    temp_c: float | None
+    feels_like_c: float | None
+    weather_desc: str
+    chance_of_rain: int | None
+    precip_mm: float | None
+    wind_kmph: float | None
+
+    @classmethod
+    def from_j1(cls, entry: dict) -> "Hour":
+        # wttr.in gives the time as "0", "300", ..., "2100"
+        hhmm = str(entry.get("time", "0")).zfill(4)
+        return cls(
+            time=f"{hhmm[:2]}:{hhmm[2:]}",
+            temp_c=_num(entry.get("tempC")),
+            feels_like_c=_num(entry.get("FeelsLikeC")),
+            weather_desc=_desc(entry),
+            chance_of_rain=_num(entry.get("chanceofrain"), int),
+            precip_mm=_num(entry.get("precipMM")),
+            wind_kmph=_num(entry.get("windspeedKmph")),
+        )
+
+
+@dataclass(slots=True)
+class Day:
+    date: str
+    max_temp_c: float | None
+    min_temp_c: float | None
+    avg_temp_c: float | None
+    sun_hours: float | None
+    hours: list = field(default_factory=list)
+
+    @classmethod
+    def from_j1(cls, entry: dict) -> "Day":
+        return cls(
+            date=entry.get("date", ""),
+            max_temp_c=_num(entry.get("maxtempC")),
+            min_temp_c=_num(entry.get("mintempC")),
+            avg_temp_c=_num(entry.get("avgtempC")),
+            sun_hours=_num(entry.get("sunHour")),
+            hours=[Hour.from_j1(hour) for hour in entry.get("hourly", [])],
+        )
+
+
+@dataclass(slots=True)
+class Weather:
+    city: str
+    area: str
+    country: str
+    observed_at: str
+    temp_c: float | None
+    temp_f: float | None
+    feels_like_c: float | None
+    weather_desc: str
+    humidity: int | None
+    wind_kmph: float | None
+    precip_mm: float | None
+    days: list = field(default_factory=list)
+
+    # Flat row layouts, in output order (for csv and table output)
+    CURRENT_FIELDS = ("city", "area", "country", "observed_at", "temp_c", "temp_f", "feels_like_c",
+                      "weather_desc", "humidity", "wind_kmph", "precip_mm")
+    FORECAST_FIELDS = ("city", "date", "time", "temp_c", "feels_like_c", "weather_desc", "chance_of_rain",
+                       "precip_mm", "wind_kmph")
+
+    @classmethod
+    def from_j1(cls, city: str, data: dict) -> "Weather":
+        current = (data.get("current_condition") or [{}])[0]
+        area = (data.get("nearest_area") or [{}])[0]
+        return cls(
+            city=city,
+            area=(area.get("areaName") or [{}])[0].get("value", ""),
+            country=(area.get("country") or [{}])[0].get("value", ""),
+            observed_at=current.get("localObsDateTime", ""),
+            temp_c=_num(current.get("temp_C")),
+            temp_f=_num(current.get("temp_F")),
+            feels_like_c=_num(current.get("FeelsLikeC")),
+            weather_desc=_desc(current),
+            humidity=_num(current.get("humidity"), int),
+            wind_kmph=_num(current.get("windspeedKmph")),
+            precip_mm=_num(current.get("precipMM")),
+            days=[Day.from_j1(day) for day in data.get("weather", [])],
+        )
+
+    def current(self) -> dict:
+        return {name: getattr(self, name) for name in self.CURRENT_FIELDS}
+
+    def forecast_rows(self) -> list:
+        """One flat dict per forecast hour."""
+        return [{'city': self.city, 'date': day.date, **asdict(hour)} for day in self.days for hour in day.hours]
+
+    def to_dict(self) -> dict:
+        return asdict(self)